@@ -62,6 +62,28 @@ def insert_dead_letter(
     )
 
 
+def insert_dead_letters(
+    conn: Connection, rows: list[tuple[str, str, Any]]
+) -> None:
+    if not rows:
+        return
+    params = [
+        {
+            "source": (source or "unknown")[:50],
+            "reason": (reason or "unknown")[:500],
+            "payload": payload if isinstance(payload, str) else _json_dumps(payload),
+        }
+        for source, reason, payload in rows
+    ]
+    conn.execute(
+        text("""
+            INSERT INTO ops.dead_letter_events (source, reason, payload)
+            VALUES (:source, :reason, :payload);
+            """),
+        params,
+    )
+
+
 def _insert_ignore_duplicates(
     conn: Connection, insert_sql: str, params: dict[str, Any]
 ) -> None:
@@ -4,6 +4,7 @@ from sqlalchemy import text
 
 from src.config import load_settings
 from src.db.engine import get_engine
+from src.etl._derived_schema import ensure_derived_schema
 from src.etl._ops import fail_run, finish_run, start_run
 
 
@@ -562,14 +563,15 @@ def main() -> int:
         """)
 
     # Indexes (idempotent)
-    def ix(table: str, ix_name: str, cols: str, where: str | None = None) -> None:
+    def ix(table: str, ix_name: str, cols: str, where: str | None = None, include: str | None = None) -> None:
         w = f" WHERE {where}" if where else ""
+        inc = f" INCLUDE ({include})" if include else ""
         statements.append(f"""
             IF NOT EXISTS (
                 SELECT 1 FROM sys.indexes
                 WHERE name = '{ix_name}' AND object_id = OBJECT_ID('{table}')
             )
-                CREATE INDEX {ix_name} ON {table} ({cols}){w};
+                CREATE INDEX {ix_name} ON {table} ({cols}){inc}{w};
             """)
 
     for table in [
@@ -588,11 +590,6 @@ def main() -> int:
             "user_id IS NOT NULL",
         )
 
-    ix(
-        "bronze.business_events",
-        "IX_bronze_business_events_event_timestamp",
-        "event_timestamp",
-    )
     ix("bronze.business_events", "IX_bronze_business_events_event_type", "event_type")
     ix("bronze.business_events", "IX_bronze_business_events_service", "service")
     ix(
@@ -600,6 +597,8 @@ def main() -> int:
         "IX_bronze_business_events_service_type_ts",
         "service, event_type, event_timestamp",
     )
+    # The windowed event_timestamp index is created with the derived columns it
+    # includes (ensure_derived_schema, below).
 
     for table in [
         "bronze.cart_events",
@@ -614,10 +613,41 @@ def main() -> int:
     ix("bronze.order_events", "IX_bronze_order_events_order_id", "order_id", "order_id IS NOT NULL")
 
     ix("silver.orders", "IX_silver_orders_status_created_at", "status, created_at")
-    ix("silver.order_items", "IX_silver_order_items_order_id", "order_id")
+    # Purchase fan-out into product_interactions: paid orders in the recent window,
+    # then their products per order, both answered from the indexes alone.
+    ix(
+        "silver.orders",
+        "IX_silver_orders_paid_updated_at",
+        "updated_at",
+        "status = 'paid'",
+        include="status, user_id, correlation_id",
+    )
+    # Installs created before product_id was included keep the narrower index under
+    # IF NOT EXISTS; drop it once so ix() below recreates it with the INCLUDE.
+    statements.append("""
+        IF EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'IX_silver_order_items_order_id' AND object_id = OBJECT_ID('silver.order_items')
+        )
+           AND NOT EXISTS (
+               SELECT 1
+               FROM sys.indexes i
+               INNER JOIN sys.index_columns ic
+                   ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+               INNER JOIN sys.columns c
+                   ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+               WHERE i.name = 'IX_silver_order_items_order_id'
+                 AND i.object_id = OBJECT_ID('silver.order_items')
+                 AND c.name = 'product_id'
+                 AND ic.is_included_column = 1
+           )
+            DROP INDEX IX_silver_order_items_order_id ON silver.order_items;
+        """)
+    ix("silver.order_items", "IX_silver_order_items_order_id", "order_id", include="product_id")
     ix("silver.order_items", "IX_silver_order_items_product_id", "product_id")
     ix("silver.payments", "IX_silver_payments_status_occurred_at", "status, occurred_at")
     ix("silver.reviews", "IX_silver_reviews_product_id_created_at", "product_id, created_at")
+    ix("silver.page_sequence", "IX_silver_page_sequence_event_timestamp", "event_timestamp")
 
     ix("bronze.api_request_logs", "IX_bronze_api_request_logs_timestamp", "[timestamp]")
     ix(
@@ -630,6 +660,19 @@ def main() -> int:
         "IX_bronze_api_request_logs_status_code",
         "status_code",
     )
+    # gold.system_health_daily aggregates every day in the table by service; a
+    # columnstore over just those columns lets that GROUP BY run in batch mode off
+    # compressed segments. The other bronze tables are read through the persisted
+    # is_seed/derived columns, which a columnstore index cannot carry.
+    statements.append("""
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'NCCI_bronze_api_request_logs'
+              AND object_id = OBJECT_ID('bronze.api_request_logs')
+        )
+            CREATE NONCLUSTERED COLUMNSTORE INDEX NCCI_bronze_api_request_logs
+                ON bronze.api_request_logs ([timestamp], service, status_code, response_time_ms);
+        """)
 
     ix("bronze.db_query_perf", "IX_bronze_db_query_perf_timestamp", "[timestamp]")
     ix("bronze.db_query_perf", "IX_bronze_db_query_perf_service", "service")
@@ -644,6 +687,7 @@ def main() -> int:
         try:
             for sql in statements:
                 _exec(conn, sql)
+            ensure_derived_schema(conn)
             finish_run(conn, run, rows_inserted=0)
         except Exception as exc:
             fail_run(conn, run, str(exc))
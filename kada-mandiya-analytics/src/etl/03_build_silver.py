@@ -2,29 +2,25 @@ from __future__ import annotations
 
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from sqlalchemy import text
 
 from src.config import load_settings
 from src.db.engine import get_engine
-from src.db.writers import insert_dead_letter
+from src.db.writers import insert_dead_letters
+from src.etl._derived_schema import (
+    ensure_bronze_derived_columns,
+    ensure_business_events_window_index,
+    ensure_seed_flag_columns,
+)
 from src.etl._ops import fail_run, finish_run, start_run
 from src.etl.utils_business_events import (
-    best_effort_amount,
-    best_effort_comment,
-    best_effort_currency,
-    best_effort_order_id,
-    best_effort_payment_id,
-    best_effort_product_id,
-    best_effort_provider,
-    best_effort_rating,
-    best_effort_review_id,
-    canonical_event_type,
+    CANONICAL_EVENT_MAP,
     deterministic_id,
     ensure_utc,
-    normalize_items,
-    parse_json_payload,
 )
 from src.utils.time import to_sqlserver_utc_naive, utc_now
 
@@ -38,45 +34,83 @@ def _env_int(name: str, default: int, *, min_value: int = 1, max_value: int = 36
     return max(min_value, min(max_value, value))
 
 
+# Resolved on first use rather than at import so the runner's --window-days
+# override (set in the environment before the ETL modules run) still applies.
+@lru_cache(maxsize=1)
+def _recent_days() -> int:
+    return _env_int("ETL_RECENT_DAYS", 30)
+
+
 def _parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Build Silver layer from Bronze events")
     p.add_argument(
         "--days",
         type=int,
-        default=_env_int("ETL_RECENT_DAYS", 30),
+        default=_recent_days(),
         help="Recompute window (days) for business events (default: 30)",
     )
+    p.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore silver watermarks and rescan the full ETL_RECENT_DAYS window",
+    )
     return p.parse_args()
 
 
-def _sql_in_list(name: str, values: list[str]) -> tuple[str, dict[str, object]]:
-    params: dict[str, object] = {}
-    placeholders: list[str] = []
-    for i, v in enumerate(values):
-        key = f"{name}{i}"
-        placeholders.append(f":{key}")
-        params[key] = v
-    return ",".join(placeholders), params
+# SQL counterparts of the utils_business_events helpers, kept in lockstep with
+# CANONICAL_EVENT_MAP and _candidate_dicts so set-based builds classify and pick
+# payload fields the same way the Python path does.
+_PAYLOAD_CONTAINERS: tuple[str, ...] = ("", ".meta", ".data", ".payload", ".event", ".order", ".payment", ".review")
 
 
-def _existing_ids(conn, table: str, key_col: str, ids: list[str]) -> set[str]:
-    if not ids:
-        return set()
-    ph, params = _sql_in_list("id", ids)
-    rows = conn.execute(
-        text(f"SELECT {key_col} AS id FROM {table} WHERE {key_col} IN ({ph});"), params
-    ).mappings()
-    return {str(r["id"]) for r in rows}
+def _canonical_event_type_sql(col: str) -> str:
+    key = f"LOWER(LTRIM(RTRIM({col})))"
+    whens = " ".join(f"WHEN '{raw}' THEN '{canon}'" for raw, canon in CANONICAL_EVENT_MAP.items())
+    return f"CASE WHEN ISNULL({col}, '') = '' THEN 'unknown' ELSE CASE {key} {whens} ELSE {key} END END"
 
 
-def _delete_order_items(conn, order_ids: list[str]) -> int:
-    if not order_ids:
-        return 0
-    ph, params = _sql_in_list("oid", order_ids)
-    result = conn.execute(
-        text(f"DELETE FROM silver.order_items WHERE order_id IN ({ph});"), params
+def _ensure_canonical_event_type_fn(conn) -> None:
+    # Inline TVF so the optimizer expands it into each caller's plan. Re-issued on
+    # every run to stay in sync with CANONICAL_EVENT_MAP.
+    conn.execute(
+        text(
+            f"""
+            CREATE OR ALTER FUNCTION silver.fn_canonical_event_type(@event_type nvarchar(128))
+            RETURNS TABLE
+            WITH SCHEMABINDING
+            AS
+            RETURN SELECT CAST({_canonical_event_type_sql("@event_type")} AS nvarchar(128)) AS canon;
+            """
+        )
     )
-    return int(getattr(result, "rowcount", 0) or 0)
+
+
+def _payload_pick_sql(
+    col: str,
+    keys: tuple[str, ...],
+    convert: str = "NULLIF(LTRIM(RTRIM({})), '')",
+    containers: tuple[str, ...] = _PAYLOAD_CONTAINERS,
+) -> str:
+    per_container = [
+        convert.format("COALESCE(" + ", ".join(f"JSON_VALUE({col}, '${c}.{k}')" for k in keys) + ")")
+        for c in containers
+    ]
+    return "COALESCE(" + ", ".join(per_container) + ")"
+
+
+_ITEM_LIST_KEYS: tuple[str, ...] = ("items", "order_items", "orderItems", "products", "line_items", "lineItems")
+_PAYMENT_EVENTS: frozenset[str] = frozenset({"payment_failed", "refund_created"})
+_PAYMENT_STATUS: dict[str, str] = {"payment_failed": "failed", "refund_created": "refunded"}
+
+
+def _payload_items_array_sql(col: str) -> str:
+    # First array-valued items key at the root, then under data (best_effort_items).
+    arrays = [
+        f"CASE WHEN LEFT(JSON_QUERY({col}, '${c}.{k}'), 1) = '[' THEN JSON_QUERY({col}, '${c}.{k}') END"
+        for c in ("", ".data")
+        for k in _ITEM_LIST_KEYS
+    ]
+    return "COALESCE(" + ", ".join(arrays) + ")"
 
 
 def _table_exists(conn, qualified_name: str) -> bool:
@@ -84,6 +118,23 @@ def _table_exists(conn, qualified_name: str) -> bool:
     return oid is not None
 
 
+def _stage_rows(conn, table: str, columns: tuple[str, ...], rows: list[dict]) -> None:
+    # Parameter-array binding (pyodbc fast_executemany) for the fixed-width temp
+    # staging tables only: one round-trip per batch instead of per row. It is set on
+    # this cursor rather than the shared engine, whose other executemany callers
+    # bind nvarchar(max) values. The cursor shares the connection, so the insert runs
+    # in the caller's transaction and sees its #temp table.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.fast_executemany = True
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)});",
+            [tuple(row[c] for c in columns) for row in rows],
+        )
+    finally:
+        cursor.close()
+
+
 def _table_columns(conn, qualified_name: str) -> set[str]:
     rows = conn.execute(
         text("""
@@ -130,18 +181,351 @@ def _ensure_behavior_tables(conn) -> None:
                 source_service nvarchar(64) NULL
             );
         END
+
+        IF COL_LENGTH('silver.web_events', 'clean_session_id') IS NULL
+            ALTER TABLE silver.web_events
+                ADD clean_session_id AS NULLIF(LTRIM(RTRIM(session_id)), '') PERSISTED;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'IX_silver_web_events_event_timestamp_session_id'
+              AND object_id = OBJECT_ID('silver.web_events')
+        )
+            CREATE INDEX IX_silver_web_events_event_timestamp_session_id
+                ON silver.web_events (event_timestamp, session_id);
+
+        IF OBJECT_ID('bronze.tracker_events', 'U') IS NOT NULL
+           AND COL_LENGTH('bronze.tracker_events', 'event_timestamp') IS NOT NULL
+           AND NOT EXISTS (
+               SELECT 1 FROM sys.indexes
+               WHERE name = 'IX_bronze_tracker_events_event_timestamp'
+                 AND object_id = OBJECT_ID('bronze.tracker_events')
+           )
+            EXEC('CREATE INDEX IX_bronze_tracker_events_event_timestamp ON bronze.tracker_events (event_timestamp);');
+
+        IF OBJECT_ID('bronze.click_events', 'U') IS NOT NULL
+           AND COL_LENGTH('bronze.click_events', 'derived_event_type') IS NULL
+            ALTER TABLE bronze.click_events ADD derived_event_type AS CAST(
+                CASE
+                    WHEN element_id = 'btn_add_to_cart' THEN 'add_to_cart'
+                    WHEN CASE WHEN ISJSON(properties) = 1 THEN JSON_VALUE(properties, '$.interaction_type') END = 'add_to_cart' THEN 'add_to_cart'
+                    WHEN element_id = 'btn_checkout' THEN 'begin_checkout'
+                    WHEN CASE WHEN ISJSON(properties) = 1 THEN JSON_VALUE(properties, '$.interaction_type') END IN ('checkout_started', 'begin_checkout') THEN 'begin_checkout'
+                    WHEN element_id = 'purchase_completed' THEN 'purchase'
+                    WHEN CASE WHEN ISJSON(properties) = 1 THEN JSON_VALUE(properties, '$.interaction_type') END IN ('purchase_completed', 'purchase') THEN 'purchase'
+                    ELSE 'click'
+                END AS varchar(32)
+            ) PERSISTED;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'IX_silver_web_events_user_id_event_timestamp'
+              AND object_id = OBJECT_ID('silver.web_events')
+        )
+            CREATE INDEX IX_silver_web_events_user_id_event_timestamp
+                ON silver.web_events (user_id, event_timestamp)
+                INCLUDE (session_id, event_type, page_url, product_id, element_id, properties_json);
+
+        IF COL_LENGTH('silver.purchases', 'event_ts_bucket_30m') IS NULL
+            ALTER TABLE silver.purchases
+                ADD event_ts_bucket_30m AS DATEADD(minute, (DATEDIFF(minute, 0, event_timestamp) / 30) * 30, 0) PERSISTED;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'IX_silver_purchases_user_id_bucket'
+              AND object_id = OBJECT_ID('silver.purchases')
+        )
+            EXEC('CREATE INDEX IX_silver_purchases_user_id_bucket ON silver.purchases (user_id, event_ts_bucket_30m);');
         """)
     )
 
 
-def build_silver_web_events(conn) -> int:
-    _ensure_behavior_tables(conn)
+def _ensure_session_events_window_index(conn) -> None:
+    # Gold's behavior/funnel rebuilds and the session_events reconcile all read the
+    # recent event_timestamp window; cover their columns so neither scans the heap.
+    conn.execute(
+        text("""
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes
+            WHERE name = 'IX_silver_session_events_event_timestamp'
+              AND object_id = OBJECT_ID('silver.session_events')
+        )
+            CREATE INDEX IX_silver_session_events_event_timestamp
+                ON silver.session_events (event_timestamp)
+                INCLUDE (session_id, user_id, event_type, is_seed);
+        """)
+    )
 
-    max_ts = conn.execute(text("SELECT MAX(event_timestamp) FROM silver.web_events;")).scalar()
+
+def _window_start() -> datetime:
+    return to_sqlserver_utc_naive(utc_now() - timedelta(days=_recent_days()))
+
+
+def _watermark_since(conn, table: str, *, full_refresh: bool = False) -> datetime:
+    window_start = _window_start()
+    if full_refresh:
+        return window_start
+    max_ts = conn.execute(text(f"SELECT MAX(event_timestamp) FROM {table};")).scalar()
     if max_ts is None:
-        since_ts = to_sqlserver_utc_naive(utc_now() - timedelta(days=_env_int("ETL_RECENT_DAYS", 30)))
-    else:
-        since_ts = max_ts - timedelta(minutes=2)
+        return window_start
+    # Small overlap so late-arriving bronze rows are still picked up.
+    return max_ts - timedelta(minutes=5)
+
+
+def _day_slices(since_ts: datetime):
+    # One-day [start, end) ranges up to now; the last slice is open-ended so
+    # rows stamped slightly in the future are not dropped.
+    now = to_sqlserver_utc_naive(utc_now())
+    start = since_ts
+    while start + timedelta(days=1) <= now:
+        yield start, start + timedelta(days=1)
+        start += timedelta(days=1)
+    yield start, datetime(9999, 12, 31)
+
+
+_WEB_UNION_SOURCES: dict[str, tuple[str, str]] = {
+    "bronze.page_view_events": (
+        "pv",
+        """
+        SELECT
+            pv.event_id AS source_event_id,
+            pv.event_timestamp,
+            pv.event_date,
+            LEFT(
+                COALESCE(
+                    pv.clean_session_id,
+                    JSON_VALUE(j.props, '$.session_id'),
+                    JSON_VALUE(j.props, '$.sessionId'),
+                    ''
+                ),
+                64
+            ) AS session_id,
+            pv.user_id,
+            'page_view' AS event_type,
+            pv.page_url,
+            LEFT(
+                COALESCE(
+                    JSON_VALUE(j.props, '$.product_id'),
+                    CASE
+                        WHEN pv.page_url LIKE '/products/%'
+                        THEN RIGHT(pv.page_url, CHARINDEX('/', REVERSE(pv.page_url)) - 1)
+                        ELSE NULL
+                    END
+                ),
+                64
+            ) AS product_id,
+            CAST(NULL AS nvarchar(255)) AS element_id,
+            pv.properties AS properties_json
+        FROM {src} pv
+        CROSS APPLY (SELECT CASE WHEN ISJSON(pv.properties) = 1 THEN pv.properties END AS props) j
+        """,
+    ),
+    "bronze.click_events": (
+        "ce",
+        """
+        SELECT
+            ce.event_id AS source_event_id,
+            ce.event_timestamp,
+            ce.event_date,
+            LEFT(
+                COALESCE(
+                    ce.clean_session_id,
+                    JSON_VALUE(j.props, '$.session_id'),
+                    JSON_VALUE(j.props, '$.sessionId'),
+                    ''
+                ),
+                64
+            ) AS session_id,
+            ce.user_id,
+            ce.derived_event_type AS event_type,
+            ce.page_url,
+            LEFT(
+                COALESCE(
+                    JSON_VALUE(j.props, '$.product_id'),
+                    CASE
+                        WHEN ce.page_url LIKE '/products/%'
+                        THEN RIGHT(ce.page_url, CHARINDEX('/', REVERSE(ce.page_url)) - 1)
+                        ELSE NULL
+                    END
+                ),
+                64
+            ) AS product_id,
+            ce.element_id,
+            ce.properties AS properties_json
+        FROM {src} ce
+        CROSS APPLY (SELECT CASE WHEN ISJSON(ce.properties) = 1 THEN ce.properties END AS props) j
+        """,
+    ),
+    "bronze.cart_events": (
+        "c",
+        """
+        SELECT
+            c.event_id AS source_event_id,
+            c.event_timestamp,
+            c.event_date,
+            ISNULL(c.clean_session_id, '') AS session_id,
+            c.user_id,
+            'add_to_cart' AS event_type,
+            COALESCE(c.page_url, '/') AS page_url,
+            c.product_id,
+            CAST('btn_add_to_cart' AS nvarchar(255)) AS element_id,
+            c.payload AS properties_json
+        FROM {src} c
+        """,
+    ),
+    "bronze.checkout_events": (
+        "co",
+        """
+        SELECT
+            co.event_id AS source_event_id,
+            co.event_timestamp,
+            co.event_date,
+            ISNULL(co.clean_session_id, '') AS session_id,
+            co.user_id,
+            'begin_checkout' AS event_type,
+            COALESCE(co.page_url, '/') AS page_url,
+            CAST(NULL AS nvarchar(64)) AS product_id,
+            CAST('btn_checkout' AS nvarchar(255)) AS element_id,
+            co.payload AS properties_json
+        FROM {src} co
+        """,
+    ),
+    "bronze.scroll_events": (
+        "se",
+        """
+        SELECT
+            se.event_id AS source_event_id,
+            se.event_timestamp,
+            se.event_date,
+            LEFT(
+                COALESCE(
+                    se.clean_session_id,
+                    JSON_VALUE(j.props, '$.session_id'),
+                    JSON_VALUE(j.props, '$.sessionId'),
+                    ''
+                ),
+                64
+            ) AS session_id,
+            se.user_id,
+            'scroll' AS event_type,
+            se.page_url,
+            LEFT(JSON_VALUE(j.props, '$.product_id'), 64) AS product_id,
+            CAST(NULL AS nvarchar(255)) AS element_id,
+            se.properties AS properties_json
+        FROM {src} se
+        CROSS APPLY (SELECT CASE WHEN ISJSON(se.properties) = 1 THEN se.properties END AS props) j
+        """,
+    ),
+    "bronze.search_events": (
+        "sr",
+        """
+        SELECT
+            sr.event_id AS source_event_id,
+            sr.event_timestamp,
+            sr.event_date,
+            LEFT(
+                COALESCE(
+                    sr.clean_session_id,
+                    JSON_VALUE(j.props, '$.session_id'),
+                    JSON_VALUE(j.props, '$.sessionId'),
+                    ''
+                ),
+                64
+            ) AS session_id,
+            sr.user_id,
+            'search' AS event_type,
+            sr.page_url,
+            LEFT(JSON_VALUE(j.props, '$.product_id'), 64) AS product_id,
+            CAST(NULL AS nvarchar(255)) AS element_id,
+            COALESCE(
+                sr.properties,
+                CONCAT(
+                    '{\"query\":', QUOTENAME(ISNULL(sr.query, N''), '\"'),
+                    ',\"results_count\":', COALESCE(CONVERT(varchar(20), sr.results_count), 'null'),
+                    ',\"filters\":', COALESCE(sr.filters, 'null'),
+                    '}'
+                )
+            ) AS properties_json
+        FROM {src} sr
+        CROSS APPLY (SELECT CASE WHEN ISJSON(sr.properties) = 1 THEN sr.properties END AS props) j
+        """,
+    ),
+}
+
+
+_WEB_UNION_COLUMNS = (
+    "source_event_id, event_timestamp, event_date, session_id, user_id, "
+    "event_type, page_url, product_id, element_id, properties_json"
+)
+
+
+def _ensure_bronze_web_union(conn) -> None:
+    conn.execute(
+        text(
+            """
+            IF OBJECT_ID('silver.bronze_web_union', 'U') IS NULL
+            BEGIN
+                CREATE TABLE silver.bronze_web_union(
+                    source_event_id uniqueidentifier NOT NULL,
+                    event_timestamp datetime2 NOT NULL,
+                    event_date date NOT NULL,
+                    session_id nvarchar(64) NOT NULL,
+                    user_id nvarchar(64) NULL,
+                    event_type nvarchar(64) NOT NULL,
+                    page_url nvarchar(2000) NOT NULL,
+                    product_id nvarchar(64) NULL,
+                    element_id nvarchar(255) NULL,
+                    properties_json nvarchar(max) NULL
+                );
+                CREATE CLUSTERED INDEX CIX_silver_bronze_web_union
+                    ON silver.bronze_web_union (event_timestamp, source_event_id);
+            END
+            """
+        )
+    )
+
+    # Earlier installs projected rows at ingest time with AFTER INSERT triggers; a
+    # failed projection then rejected the bronze write itself. Staging now runs in
+    # the ETL (_stage_bronze_web_union), so drop any trigger left behind.
+    for table in _WEB_UNION_SOURCES:
+        schema, name = table.split(".")
+        trigger = f"{schema}.trg_{name}_web_union"
+        conn.execute(text(f"IF OBJECT_ID('{trigger}', 'TR') IS NOT NULL DROP TRIGGER {trigger};"))
+
+
+def _stage_bronze_web_union(conn, since_ts: datetime) -> None:
+    # Projects bronze rows from the web-events window that are not staged yet; the
+    # probe is a seek on the (event_timestamp, source_event_id) clustered key, so
+    # the JSON projection only runs for new rows.
+    for table, (alias, select_sql) in _WEB_UNION_SOURCES.items():
+        if not _table_exists(conn, table):
+            continue
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO silver.bronze_web_union ({_WEB_UNION_COLUMNS})
+                {select_sql.replace("{src}", table)}
+                WHERE {alias}.event_timestamp >= :since_ts
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM silver.bronze_web_union u
+                      WHERE u.event_timestamp = {alias}.event_timestamp
+                        AND u.source_event_id = {alias}.event_id
+                  );
+                """
+            ),
+            {"since_ts": since_ts},
+        )
+
+
+def build_silver_web_events(conn, *, full_refresh: bool = False) -> int:
+    _ensure_behavior_tables(conn)
+    ensure_bronze_derived_columns(conn)
+
+    since_ts = _watermark_since(conn, "silver.web_events", full_refresh=full_refresh)
+    # TABLOCK would block readers of silver.web_events for the whole insert, so only a
+    # full refresh, which rewrites the table anyway, takes it.
+    insert_hint = " WITH (TABLOCK)" if full_refresh else ""
 
     if _table_exists(conn, "bronze.tracker_events"):
         cols = _table_columns(conn, "bronze.tracker_events")
@@ -155,7 +539,7 @@ def build_silver_web_events(conn) -> int:
         has_user_id = "user_id" in cols
 
         if not cols or not has_session_id:
-            sql = ""
+            src_cte = sql = ""
         else:
             ts_col = "t.event_timestamp" if "event_timestamp" in cols else "t.[timestamp]"
 
@@ -169,7 +553,7 @@ def build_silver_web_events(conn) -> int:
             )
             src_user_id = "t.user_id" if has_user_id else "JSON_VALUE(t.properties, '$.user_id')"
 
-            sql = f"""
+            src_cte = f"""
             ;WITH src AS (
                 SELECT
                     {src_event_id} AS source_event_id,
@@ -190,8 +574,9 @@ def build_silver_web_events(conn) -> int:
                 {src_element_id} AS element_id,
                 t.properties AS properties_json
             FROM bronze.tracker_events t
-            WHERE {ts_col} >= :since_ts
-            ),
+            WHERE {ts_col} >= :slice_start AND {ts_col} < :slice_end
+            )"""
+            sql = src_cte + f""",
             dedup AS (
                 SELECT
                     event_timestamp,
@@ -215,7 +600,7 @@ def build_silver_web_events(conn) -> int:
                     ) AS rn
                 FROM src
             )
-            INSERT INTO silver.web_events
+            INSERT INTO silver.web_events{insert_hint}
                 (event_timestamp, event_date, session_id, user_id, event_type, page_url, product_id, element_id, properties_json)
             SELECT
                 d.event_timestamp,
@@ -238,161 +623,33 @@ def build_silver_web_events(conn) -> int:
                     AND w.page_url = d.page_url
                     AND ISNULL(w.element_id, '') = ISNULL(d.element_id, '')
                     AND ISNULL(w.product_id, '') = ISNULL(d.product_id, '')
-              );
+              )
+            OPTION (MAXDOP 8, RECOMPILE);
             """
     else:
-        sql = """
+        _ensure_bronze_web_union(conn)
+        conn.execute(
+            text("DELETE FROM silver.bronze_web_union WHERE event_timestamp < :window_start;"),
+            {"window_start": _window_start()},
+        )
+        _stage_bronze_web_union(conn, since_ts)
+        src_cte = """
         ;WITH src AS (
             SELECT
-                pv.event_id AS source_event_id,
-                pv.event_timestamp,
-                CAST(pv.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(pv.session_id)), ''),
-                    JSON_VALUE(pv.properties, '$.session_id'),
-                    JSON_VALUE(pv.properties, '$.sessionId'),
-                    CONCAT('derived:', COALESCE(pv.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(pv.event_timestamp AS date), 120))
-                ) AS session_id,
-                pv.user_id,
-                'page_view' AS event_type,
-                pv.page_url,
-                COALESCE(
-                    JSON_VALUE(pv.properties, '$.product_id'),
-                    CASE
-                        WHEN pv.page_url LIKE '/products/%'
-                        THEN RIGHT(pv.page_url, CHARINDEX('/', REVERSE(pv.page_url)) - 1)
-                        ELSE NULL
-                    END
-                ) AS product_id,
-                CAST(NULL AS nvarchar(255)) AS element_id,
-                pv.properties AS properties_json
-            FROM bronze.page_view_events pv
-            WHERE pv.event_timestamp >= :since_ts
-
-            UNION ALL
-
-            SELECT
-                ce.event_id AS source_event_id,
-                ce.event_timestamp,
-                CAST(ce.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(ce.session_id)), ''),
-                    JSON_VALUE(ce.properties, '$.session_id'),
-                    JSON_VALUE(ce.properties, '$.sessionId'),
-                    CONCAT('derived:', COALESCE(ce.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(ce.event_timestamp AS date), 120))
-                ) AS session_id,
-                ce.user_id,
-                CASE
-                    WHEN ce.element_id = 'btn_add_to_cart' THEN 'add_to_cart'
-                    WHEN COALESCE(JSON_VALUE(ce.properties, '$.interaction_type'), '') = 'add_to_cart' THEN 'add_to_cart'
-                    WHEN ce.element_id = 'btn_checkout' THEN 'begin_checkout'
-                    WHEN COALESCE(JSON_VALUE(ce.properties, '$.interaction_type'), '') IN ('checkout_started', 'begin_checkout') THEN 'begin_checkout'
-                    WHEN ce.element_id = 'purchase_completed' THEN 'purchase'
-                    WHEN COALESCE(JSON_VALUE(ce.properties, '$.interaction_type'), '') IN ('purchase_completed', 'purchase') THEN 'purchase'
-                    ELSE 'click'
-                END AS event_type,
-                ce.page_url,
-                COALESCE(
-                    JSON_VALUE(ce.properties, '$.product_id'),
-                    CASE
-                        WHEN ce.page_url LIKE '/products/%'
-                        THEN RIGHT(ce.page_url, CHARINDEX('/', REVERSE(ce.page_url)) - 1)
-                        ELSE NULL
-                    END
-                ) AS product_id,
-                ce.element_id,
-                ce.properties AS properties_json
-            FROM bronze.click_events ce
-            WHERE ce.event_timestamp >= :since_ts
-
-            UNION ALL
-
-            SELECT
-                c.event_id AS source_event_id,
-                c.event_timestamp,
-                CAST(c.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(c.session_id)), ''),
-                    CONCAT('derived:', COALESCE(c.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(c.event_timestamp AS date), 120))
-                ) AS session_id,
-                c.user_id,
-                'add_to_cart' AS event_type,
-                COALESCE(c.page_url, '/') AS page_url,
-                c.product_id,
-                CAST('btn_add_to_cart' AS nvarchar(255)) AS element_id,
-                c.payload AS properties_json
-            FROM bronze.cart_events c
-            WHERE c.event_timestamp >= :since_ts
-
-            UNION ALL
-
-            SELECT
-                co.event_id AS source_event_id,
-                co.event_timestamp,
-                CAST(co.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(co.session_id)), ''),
-                    CONCAT('derived:', COALESCE(co.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(co.event_timestamp AS date), 120))
-                ) AS session_id,
-                co.user_id,
-                'begin_checkout' AS event_type,
-                COALESCE(co.page_url, '/') AS page_url,
-                CAST(NULL AS nvarchar(64)) AS product_id,
-                CAST('btn_checkout' AS nvarchar(255)) AS element_id,
-                co.payload AS properties_json
-            FROM bronze.checkout_events co
-            WHERE co.event_timestamp >= :since_ts
-
-            UNION ALL
-
-            SELECT
-                se.event_id AS source_event_id,
-                se.event_timestamp,
-                CAST(se.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(se.session_id)), ''),
-                    JSON_VALUE(se.properties, '$.session_id'),
-                    JSON_VALUE(se.properties, '$.sessionId'),
-                    CONCAT('derived:', COALESCE(se.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(se.event_timestamp AS date), 120))
-                ) AS session_id,
-                se.user_id,
-                'scroll' AS event_type,
-                se.page_url,
-                COALESCE(JSON_VALUE(se.properties, '$.product_id'), NULL) AS product_id,
-                CAST(NULL AS nvarchar(255)) AS element_id,
-                se.properties AS properties_json
-            FROM bronze.scroll_events se
-            WHERE se.event_timestamp >= :since_ts
-
-            UNION ALL
-
-            SELECT
-                sr.event_id AS source_event_id,
-                sr.event_timestamp,
-                CAST(sr.event_timestamp AS date) AS event_date,
-                COALESCE(
-                    NULLIF(LTRIM(RTRIM(sr.session_id)), ''),
-                    JSON_VALUE(sr.properties, '$.session_id'),
-                    JSON_VALUE(sr.properties, '$.sessionId'),
-                    CONCAT('derived:', COALESCE(sr.user_id, 'anon'), ':', CONVERT(varchar(10), CAST(sr.event_timestamp AS date), 120))
-                ) AS session_id,
-                sr.user_id,
-                'search' AS event_type,
-                sr.page_url,
-                COALESCE(JSON_VALUE(sr.properties, '$.product_id'), NULL) AS product_id,
-                CAST(NULL AS nvarchar(255)) AS element_id,
-                COALESCE(
-                    sr.properties,
-                    CONCAT(
-                        '{\"query\":', QUOTENAME(ISNULL(sr.query, N''), '\"'),
-                        ',\"results_count\":', COALESCE(CONVERT(varchar(20), sr.results_count), 'null'),
-                        ',\"filters\":', COALESCE(sr.filters, 'null'),
-                        '}'
-                    )
-                ) AS properties_json
-            FROM bronze.search_events sr
-            WHERE sr.event_timestamp >= :since_ts
-        ),
+                source_event_id,
+                event_timestamp,
+                event_date,
+                session_id,
+                user_id,
+                event_type,
+                page_url,
+                product_id,
+                element_id,
+                properties_json
+            FROM silver.bronze_web_union
+            WHERE event_timestamp >= :slice_start AND event_timestamp < :slice_end
+        )"""
+        sql = src_cte + f""",
         dedup AS (
             SELECT
                 event_timestamp,
@@ -411,12 +668,13 @@ def build_silver_web_events(conn) -> int:
                         event_type,
                         page_url,
                         ISNULL(element_id, ''),
-                        ISNULL(product_id, '')
+                        ISNULL(product_id, ''),
+                        CASE WHEN session_id = '' THEN ISNULL(user_id, '') ELSE '' END
                     ORDER BY source_event_id
                 ) AS rn
             FROM src
         )
-        INSERT INTO silver.web_events
+        INSERT INTO silver.web_events{insert_hint}
             (event_timestamp, event_date, session_id, user_id, event_type, page_url, product_id, element_id, properties_json)
         SELECT
             d.event_timestamp,
@@ -439,63 +697,117 @@ def build_silver_web_events(conn) -> int:
                 AND w.page_url = d.page_url
                 AND ISNULL(w.element_id, '') = ISNULL(d.element_id, '')
                 AND ISNULL(w.product_id, '') = ISNULL(d.product_id, '')
-          );
+                AND (d.session_id <> '' OR ISNULL(w.user_id, '') = ISNULL(d.user_id, ''))
+          )
+        OPTION (MAXDOP 8, RECOMPILE);
         """
 
     if not sql:
         return 0
 
-    res = conn.execute(text(sql), {"since_ts": since_ts})
-    rc = int(getattr(res, "rowcount", 0) or 0)
-    return rc if rc > 0 else 0
+    # Cheap probe before the per-slice inserts: most scheduler ticks find every
+    # bronze row in the overlap window already present in silver.
+    pending = conn.execute(
+        text(
+            src_cte
+            + """
+            SELECT TOP 1 1
+            FROM src d
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM silver.web_events w
+                WHERE w.event_timestamp = d.event_timestamp
+                  AND w.session_id = d.session_id
+                  AND w.event_type = d.event_type
+                  AND w.page_url = d.page_url
+                  AND ISNULL(w.element_id, '') = ISNULL(d.element_id, '')
+                  AND ISNULL(w.product_id, '') = ISNULL(d.product_id, '')
+                  AND (d.session_id <> '' OR ISNULL(w.user_id, '') = ISNULL(d.user_id, ''))
+            );
+            """
+        ),
+        {"slice_start": since_ts, "slice_end": datetime(9999, 12, 31)},
+    ).scalar()
+    if pending is None:
+        return 0
 
+    stmt = text(sql)
+    rows = 0
+    for slice_start, slice_end in _day_slices(since_ts):
+        res = conn.execute(stmt, {"slice_start": slice_start, "slice_end": slice_end})
+        rows += max(0, int(getattr(res, "rowcount", 0) or 0))
+    return rows
 
-def build_silver_purchases(conn) -> int:
+
+def build_silver_purchases(conn, *, full_refresh: bool = False) -> int:
     _ensure_behavior_tables(conn)
+    ensure_bronze_derived_columns(conn)
+
+    since_ts = _watermark_since(conn, "silver.purchases", full_refresh=full_refresh)
+
+    # entity_id is the preferred order id; rows without it always count as pending.
+    pending = conn.execute(
+        text(
+            """
+            SELECT TOP 1 1
+            FROM bronze.business_events be
+            WHERE be.event_timestamp >= :since_ts
+              AND LOWER(LTRIM(RTRIM(be.event_type))) IN (
+                  'order_paid',
+                  'order.paid',
+                  'payment.succeeded',
+                  'payment.success',
+                  'payment_success'
+              )
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM silver.purchases p
+                  WHERE p.order_id = be.entity_id
+                    AND p.event_timestamp <= be.event_timestamp
+              );
+            """
+        ),
+        {"since_ts": since_ts},
+    ).scalar()
+    if pending is None:
+        return 0
 
-    since_ts = to_sqlserver_utc_naive(utc_now() - timedelta(days=_env_int("ETL_RECENT_DAYS", 30)))
     res = conn.execute(
         text(
             """
             ;WITH src AS (
                 SELECT
                     be.event_timestamp,
-                    CAST(be.event_timestamp AS date) AS event_date,
-                    COALESCE(
-                        be.entity_id,
-                        JSON_VALUE(be.payload, '$.order_id'),
-                        JSON_VALUE(be.payload, '$.data.order_id'),
-                        JSON_VALUE(be.payload, '$.order.order_id')
-                    ) AS order_id,
+                    be.event_date,
+                    COALESCE(be.entity_id, j.order_id, j.data_order_id, j.order_order_id) AS order_id,
                     be.user_id,
                     TRY_CONVERT(
                         decimal(12,2),
-                        COALESCE(
-                            JSON_VALUE(be.payload, '$.total_amount'),
-                            JSON_VALUE(be.payload, '$.data.total_amount'),
-                            JSON_VALUE(be.payload, '$.order.total_amount'),
-                            JSON_VALUE(be.payload, '$.amount'),
-                            JSON_VALUE(be.payload, '$.data.amount')
-                        )
+                        COALESCE(j.total_amount, j.data_total_amount, j.order_total_amount, j.amount, j.data_amount)
                     ) AS total_amount,
-                    COALESCE(
-                        JSON_VALUE(be.payload, '$.currency'),
-                        JSON_VALUE(be.payload, '$.data.currency'),
-                        JSON_VALUE(be.payload, '$.order.currency'),
-                        JSON_VALUE(be.payload, '$.payment.currency')
-                    ) AS currency,
+                    COALESCE(j.currency, j.data_currency, j.order_currency, j.payment_currency) AS currency,
                     be.correlation_id,
                     be.service AS source_service,
                     ROW_NUMBER() OVER (
-                        PARTITION BY COALESCE(
-                            be.entity_id,
-                            JSON_VALUE(be.payload, '$.order_id'),
-                            JSON_VALUE(be.payload, '$.data.order_id'),
-                            JSON_VALUE(be.payload, '$.order.order_id')
-                        )
+                        PARTITION BY COALESCE(be.entity_id, j.order_id, j.data_order_id, j.order_order_id)
                         ORDER BY be.event_timestamp ASC
                     ) AS rn
                 FROM bronze.business_events be
+                OUTER APPLY OPENJSON(CASE WHEN ISJSON(be.payload) = 1 THEN be.payload END)
+                WITH (
+                    order_id nvarchar(64) '$.order_id',
+                    data_order_id nvarchar(64) '$.data.order_id',
+                    order_order_id nvarchar(64) '$.order.order_id',
+                    total_amount nvarchar(50) '$.total_amount',
+                    data_total_amount nvarchar(50) '$.data.total_amount',
+                    order_total_amount nvarchar(50) '$.order.total_amount',
+                    amount nvarchar(50) '$.amount',
+                    data_amount nvarchar(50) '$.data.amount',
+                    currency nvarchar(10) '$.currency',
+                    data_currency nvarchar(10) '$.data.currency',
+                    order_currency nvarchar(10) '$.order.currency',
+                    payment_currency nvarchar(10) '$.payment.currency'
+                ) j
                 WHERE be.event_timestamp >= :since_ts
                   AND LOWER(LTRIM(RTRIM(be.event_type))) IN (
                       'order_paid',
@@ -587,119 +899,202 @@ def _ensure_session_fact_tables(conn) -> None:
     )
 
 
-def build_silver_session_facts(conn, *, days: int) -> int:
+def _session_facts_stale(conn, since_ts) -> bool:
+    stale = conn.execute(
+        text(
+            """
+            DECLARE @built datetime2 = (SELECT MAX(event_timestamp) FROM silver.session_events);
+            DECLARE @built_from datetime2 = (SELECT MIN(event_timestamp) FROM silver.session_events);
+            SELECT CASE
+                WHEN @built IS NULL THEN 1
+                -- A wider --days than the last build reaches web events never sessionized.
+                WHEN EXISTS (
+                    SELECT 1 FROM silver.web_events
+                    WHERE event_timestamp >= :since_ts AND event_timestamp < @built_from
+                ) THEN 1
+                WHEN EXISTS (
+                    SELECT 1 FROM silver.web_events
+                    WHERE event_timestamp >= :since_ts AND event_timestamp > @built
+                ) THEN 1
+                WHEN EXISTS (
+                    SELECT 1 FROM silver.purchases
+                    WHERE event_timestamp >= :since_ts AND event_timestamp > @built
+                ) THEN 1
+                ELSE 0
+            END;
+            """
+        ),
+        {"since_ts": since_ts},
+    ).scalar()
+    return bool(stale)
+
+
+def build_silver_session_facts(
+    conn, *, days: int, inputs_changed: bool = True, full_refresh: bool = False
+) -> int:
     _ensure_session_fact_tables(conn)
 
     since_ts = to_sqlserver_utc_naive(utc_now() - timedelta(days=max(1, int(days or 30))))
 
+    # Session facts derive only from silver.web_events and silver.purchases; when
+    # neither moved there is nothing to reconcile. Web events commit on their own
+    # connection, so a failed earlier run can leave them ahead of the facts: compare
+    # the tables themselves rather than trusting this run's insert counts alone.
+    if not (full_refresh or inputs_changed) and not _session_facts_stale(conn, since_ts):
+        return 0
+
     conn.execute(
         text(
             """
-            DELETE sp
-            FROM silver.session_products sp
-            INNER JOIN silver.sessions s ON sp.session_id = s.session_id
-            WHERE s.session_end >= :since_ts;
+            IF OBJECT_ID('tempdb..#session_events') IS NOT NULL DROP TABLE #session_events;
+            IF OBJECT_ID('tempdb..#sessions') IS NOT NULL DROP TABLE #sessions;
+            IF OBJECT_ID('tempdb..#session_products') IS NOT NULL DROP TABLE #session_products;
+
+            CREATE TABLE #session_events(
+                event_timestamp datetime2 NOT NULL,
+                event_date date NOT NULL,
+                session_id nvarchar(64) NOT NULL,
+                user_id nvarchar(64) NULL,
+                event_type nvarchar(64) NOT NULL,
+                page_url nvarchar(2000) NULL,
+                product_id nvarchar(64) NULL,
+                element_id nvarchar(255) NULL,
+                properties_json nvarchar(max) NULL
+            );
+            -- Both rollups below group on a session_id prefix, so they can stream-aggregate
+            -- off this order instead of sorting or hashing the event set twice.
+            CREATE CLUSTERED INDEX CX_session_events ON #session_events (session_id, product_id);
+            CREATE TABLE #sessions(
+                session_id nvarchar(64) NOT NULL PRIMARY KEY,
+                user_id nvarchar(64) NULL,
+                session_start datetime2 NOT NULL,
+                session_end datetime2 NOT NULL,
+                duration_seconds int NOT NULL,
+                events_count int NOT NULL
+            );
+            CREATE TABLE #session_products(
+                session_id nvarchar(64) NOT NULL,
+                product_id nvarchar(64) NOT NULL,
+                first_seen datetime2 NOT NULL,
+                last_seen datetime2 NOT NULL,
+                views int NOT NULL,
+                clicks int NOT NULL,
+                add_to_cart int NOT NULL,
+                begin_checkout int NOT NULL,
+                purchases int NOT NULL,
+                PRIMARY KEY (session_id, product_id)
+            );
             """
-        ),
-        {"since_ts": since_ts},
-    )
-    conn.execute(
-        text("DELETE FROM silver.session_events WHERE event_timestamp >= :since_ts;"),
-        {"since_ts": since_ts},
-    )
-    conn.execute(
-        text("DELETE FROM silver.sessions WHERE session_end >= :since_ts;"),
-        {"since_ts": since_ts},
+        )
     )
 
-    # Sessionize web events (prefer explicit session_id; derive by time-window when missing)
-    res = conn.execute(
+    # Sessionize web events: provided session ids pass through, anonymous rows bucket by
+    # page/day, and only user-keyed rows without a session id go through the 30-minute window.
+    # Temp tables are created above in an unparameterized batch so they outlive the
+    # parameterized (sp_executesql) batch below, which then runs the sessionize insert,
+    # the three reconciling MERGEs and the cleanup in a single round-trip.
+    rows = conn.execute(
         text(
             """
+            SET NOCOUNT ON;
+            DECLARE @rows int;
+
             ;WITH web_base AS (
                 SELECT
                     we.event_timestamp,
-                    CAST(we.event_timestamp AS date) AS event_date,
-                    NULLIF(LTRIM(RTRIM(we.user_id)), '') AS user_id,
-                    NULLIF(LTRIM(RTRIM(we.session_id)), '') AS raw_session_id,
+                    we.event_date,
+                    n.user_id,
+                    CASE
+                        WHEN n.raw_session_id IS NULL THEN NULL
+                        WHEN n.raw_session_id LIKE 'derived:%' THEN NULL
+                        ELSE n.raw_session_id
+                    END AS provided_session_id,
                     we.event_type,
                     we.page_url,
                     NULLIF(LTRIM(RTRIM(we.product_id)), '') AS product_id,
                     we.element_id,
                     we.properties_json
                 FROM silver.web_events we
+                CROSS APPLY (
+                    SELECT
+                        NULLIF(LTRIM(RTRIM(we.user_id)), '') AS user_id,
+                        we.clean_session_id AS raw_session_id
+                ) n
                 WHERE we.event_timestamp >= :since_ts
             ),
-            web_norm AS (
+            web_provided AS (
                 SELECT
-                    *,
-                    CASE
-                        WHEN raw_session_id IS NULL THEN NULL
-                        WHEN raw_session_id LIKE 'derived:%' THEN NULL
-                        ELSE raw_session_id
-                    END AS provided_session_id
+                    event_timestamp,
+                    event_date,
+                    provided_session_id AS session_id,
+                    user_id,
+                    event_type,
+                    page_url,
+                    product_id,
+                    element_id,
+                    properties_json
                 FROM web_base
+                WHERE provided_session_id IS NOT NULL
             ),
-            web_with_prev AS (
+            web_anon AS (
                 SELECT
-                    *,
-                    LAG(event_timestamp) OVER (PARTITION BY user_id ORDER BY event_timestamp) AS prev_ts
-                FROM web_norm
+                    event_timestamp,
+                    event_date,
+                    CONCAT(
+                        'anon:',
+                        CONVERT(
+                            varchar(32),
+                            HASHBYTES('MD5', CONCAT('anon|', COALESCE(page_url, ''), '|', CONVERT(varchar(10), event_date, 120))),
+                            2
+                        )
+                    ) AS session_id,
+                    user_id,
+                    event_type,
+                    page_url,
+                    product_id,
+                    element_id,
+                    properties_json
+                FROM web_base
+                WHERE provided_session_id IS NULL AND user_id IS NULL
             ),
-            web_flags AS (
+            web_user_prev AS (
                 SELECT
                     *,
-                    CASE
-                        WHEN provided_session_id IS NOT NULL THEN 0
-                        WHEN user_id IS NULL THEN 0
-                        WHEN prev_ts IS NULL THEN 1
-                        WHEN DATEDIFF(minute, prev_ts, event_timestamp) > 30 THEN 1
-                        ELSE 0
-                    END AS new_session_flag
-                FROM web_with_prev
+                    LAG(event_timestamp) OVER (PARTITION BY user_id ORDER BY event_timestamp) AS prev_ts
+                FROM web_base
+                WHERE provided_session_id IS NULL AND user_id IS NOT NULL
             ),
-            web_groups AS (
+            web_user_groups AS (
                 SELECT
                     *,
-                    CASE
-                        WHEN provided_session_id IS NOT NULL THEN 0
-                        WHEN user_id IS NULL THEN 0
-                        ELSE SUM(new_session_flag) OVER (
-                            PARTITION BY user_id
-                            ORDER BY event_timestamp
-                            ROWS UNBOUNDED PRECEDING
-                        )
-                    END AS session_group
-                FROM web_flags
+                    SUM(
+                        CASE
+                            WHEN prev_ts IS NULL THEN 1
+                            WHEN DATEDIFF(minute, prev_ts, event_timestamp) > 30 THEN 1
+                            ELSE 0
+                        END
+                    ) OVER (
+                        PARTITION BY user_id
+                        ORDER BY event_timestamp
+                        ROWS UNBOUNDED PRECEDING
+                    ) AS session_group
+                FROM web_user_prev
             ),
-            web_start AS (
-                SELECT
-                    *,
-                    CASE
-                        WHEN provided_session_id IS NOT NULL THEN MIN(event_timestamp) OVER (PARTITION BY provided_session_id)
-                        WHEN user_id IS NULL THEN MIN(event_timestamp) OVER (PARTITION BY page_url, event_date)
-                        ELSE MIN(event_timestamp) OVER (PARTITION BY user_id, session_group)
-                    END AS session_start_ts
-                FROM web_groups
-            ),
-            web_sessioned AS (
+            web_user_keyed AS (
                 SELECT
                     event_timestamp,
                     event_date,
-                    COALESCE(
-                        provided_session_id,
-                        CASE
-                            WHEN user_id IS NULL THEN CONVERT(
-                                varchar(64),
-                                HASHBYTES('SHA2_256', CONCAT('anon|', COALESCE(page_url, ''), '|', CONVERT(varchar(10), event_date, 120))),
-                                2
+                    CONVERT(
+                        varchar(32),
+                        HASHBYTES(
+                            'MD5',
+                            CONCAT(
+                                'u:', user_id,
+                                '|', CONVERT(varchar(19), MIN(event_timestamp) OVER (PARTITION BY user_id, session_group), 126),
+                                '|', CAST(session_group AS varchar(10))
                             )
-                            ELSE CONVERT(
-                                varchar(64),
-                                HASHBYTES('SHA2_256', CONCAT('u:', user_id, '|', CONVERT(varchar(19), session_start_ts, 126), '|', CAST(session_group AS varchar(10)))),
-                                2
-                            )
-                        END
+                        ),
+                        2
                     ) AS session_id,
                     user_id,
                     event_type,
@@ -707,7 +1102,14 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                     product_id,
                     element_id,
                     properties_json
-                FROM web_start
+                FROM web_user_groups
+            ),
+            web_sessioned AS (
+                SELECT * FROM web_provided
+                UNION ALL
+                SELECT * FROM web_anon
+                UNION ALL
+                SELECT * FROM web_user_keyed
             ),
             web_bounds AS (
                 SELECT
@@ -721,7 +1123,8 @@ def build_silver_session_facts(conn, *, days: int) -> int:
             purchases_src AS (
                 SELECT
                     p.event_timestamp,
-                    CAST(p.event_timestamp AS date) AS event_date,
+                    p.event_date,
+                    p.event_ts_bucket_30m,
                     NULLIF(LTRIM(RTRIM(p.user_id)), '') AS user_id,
                     p.order_id,
                     p.total_amount,
@@ -729,25 +1132,34 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                 FROM silver.purchases p
                 WHERE p.event_timestamp >= :since_ts
             ),
+            purchase_matches AS (
+                -- Equi-join on user_id with the range as a residual so the optimizer can
+                -- hash-join instead of probing web_bounds once per purchase.
+                SELECT
+                    p.*,
+                    b.session_id AS web_session_id,
+                    ROW_NUMBER() OVER (PARTITION BY p.order_id ORDER BY b.session_end DESC) AS rn
+                FROM purchases_src p
+                LEFT JOIN web_bounds b
+                    ON b.user_id = p.user_id
+                   AND p.event_timestamp >= DATEADD(minute, -15, b.session_start)
+                   AND p.event_timestamp <= DATEADD(minute, 30, b.session_end)
+            ),
             purchase_sessioned AS (
                 SELECT
                     p.event_timestamp,
                     p.event_date,
                     COALESCE(
-                        wb.session_id,
+                        p.web_session_id,
                         CONVERT(
-                            varchar(64),
+                            varchar(32),
                             HASHBYTES(
-                                'SHA2_256',
+                                'MD5',
                                 CONCAT(
                                     'purchase|u:',
                                     COALESCE(p.user_id, 'anon'),
                                     '|',
-                                    CONVERT(
-                                        varchar(19),
-                                        DATEADD(minute, (DATEDIFF(minute, 0, p.event_timestamp) / 30) * 30, 0),
-                                        126
-                                    )
+                                    CONVERT(varchar(19), p.event_ts_bucket_30m, 126)
                                 )
                             ),
                             2
@@ -765,15 +1177,8 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                             ',\"currency\":', QUOTENAME(ISNULL(p.currency, N''), '\"'),
                         '}'
                     ) AS properties_json
-                FROM purchases_src p
-                OUTER APPLY (
-                    SELECT TOP 1 b.session_id
-                    FROM web_bounds b
-                    WHERE b.user_id = p.user_id
-                      AND p.event_timestamp >= DATEADD(minute, -15, b.session_start)
-                      AND p.event_timestamp <= DATEADD(minute, 30, b.session_end)
-                    ORDER BY b.session_end DESC
-                ) wb
+                FROM purchase_matches p
+                WHERE p.rn = 1
             ),
             src AS (
                 SELECT * FROM web_sessioned
@@ -805,22 +1210,44 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                     ) AS rn
                 FROM src
             )
-            INSERT INTO silver.session_events
+            INSERT INTO #session_events
                 (event_timestamp, event_date, session_id, user_id, event_type, page_url, product_id, element_id, properties_json)
             SELECT
                 event_timestamp, event_date, session_id, user_id, event_type, page_url, product_id, element_id, properties_json
             FROM dedup
-            WHERE rn = 1;
-            """
-        ),
-        {"since_ts": since_ts},
-    )
-    rows = int(getattr(res, "rowcount", 0) or 0)
+            WHERE rn = 1
+            OPTION (MAXDOP 8);
 
-    conn.execute(
-        text(
-            """
-            INSERT INTO silver.sessions (session_id, user_id, session_start, session_end, duration_seconds, events_count)
+            -- Reconcile the recompute window in place: the filtered CTE target scopes
+            -- NOT MATCHED BY SOURCE to rows at or after since_ts.
+            ;WITH tgt AS (
+                SELECT *
+                FROM silver.session_events
+                WHERE event_timestamp >= :since_ts
+            )
+            MERGE tgt
+            USING #session_events AS src
+            ON tgt.event_timestamp = src.event_timestamp
+               AND tgt.session_id = src.session_id
+               AND tgt.event_type = src.event_type
+               AND ISNULL(tgt.page_url, '') = ISNULL(src.page_url, '')
+               AND ISNULL(tgt.element_id, '') = ISNULL(src.element_id, '')
+               AND ISNULL(tgt.product_id, '') = ISNULL(src.product_id, '')
+            WHEN MATCHED AND (
+                ISNULL(tgt.user_id, '') <> ISNULL(src.user_id, '')
+                OR ISNULL(tgt.properties_json, '') <> ISNULL(src.properties_json, '')
+            ) THEN
+                UPDATE SET
+                    tgt.user_id = src.user_id,
+                    tgt.properties_json = src.properties_json
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (event_timestamp, event_date, session_id, user_id, event_type, page_url, product_id, element_id, properties_json)
+                VALUES (src.event_timestamp, src.event_date, src.session_id, src.user_id, src.event_type, src.page_url, src.product_id, src.element_id, src.properties_json)
+            WHEN NOT MATCHED BY SOURCE THEN
+                DELETE;
+            SET @rows = @@ROWCOUNT;
+
+            INSERT INTO #sessions (session_id, user_id, session_start, session_end, duration_seconds, events_count)
             SELECT
                 session_id,
                 MAX(user_id) AS user_id,
@@ -831,18 +1258,10 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                     ELSE DATEDIFF(second, MIN(event_timestamp), MAX(event_timestamp))
                 END AS duration_seconds,
                 COUNT(*) AS events_count
-            FROM silver.session_events
-            WHERE event_timestamp >= :since_ts
+            FROM #session_events
             GROUP BY session_id;
-            """
-        ),
-        {"since_ts": since_ts},
-    )
 
-    conn.execute(
-        text(
-            """
-            INSERT INTO silver.session_products
+            INSERT INTO #session_products
                 (session_id, product_id, first_seen, last_seen, views, clicks, add_to_cart, begin_checkout, purchases)
             SELECT
                 session_id,
@@ -854,616 +1273,912 @@ def build_silver_session_facts(conn, *, days: int) -> int:
                 SUM(CASE WHEN event_type = 'add_to_cart' THEN 1 ELSE 0 END) AS add_to_cart,
                 SUM(CASE WHEN event_type = 'begin_checkout' THEN 1 ELSE 0 END) AS begin_checkout,
                 SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) AS purchases
-            FROM silver.session_events
-            WHERE event_timestamp >= :since_ts
-              AND product_id IS NOT NULL
+            FROM #session_events
+            WHERE product_id IS NOT NULL
               AND LTRIM(RTRIM(product_id)) <> ''
-            GROUP BY session_id, product_id;
+            GROUP BY session_id, product_id
+            OPTION (MAXDOP 8);
+
+            -- session_products first, while silver.sessions still reflects the previous run.
+            ;WITH tgt AS (
+                SELECT sp.*
+                FROM silver.session_products sp
+                WHERE sp.session_id IN (
+                    SELECT s.session_id FROM silver.sessions s WHERE s.session_end >= :since_ts
+                    UNION
+                    SELECT p.session_id FROM #session_products p
+                )
+            )
+            MERGE tgt
+            USING #session_products AS src
+            ON tgt.session_id = src.session_id AND tgt.product_id = src.product_id
+            WHEN MATCHED AND (
+                tgt.first_seen <> src.first_seen
+                OR tgt.last_seen <> src.last_seen
+                OR tgt.views <> src.views
+                OR tgt.clicks <> src.clicks
+                OR tgt.add_to_cart <> src.add_to_cart
+                OR tgt.begin_checkout <> src.begin_checkout
+                OR tgt.purchases <> src.purchases
+            ) THEN
+                UPDATE SET
+                    tgt.first_seen = src.first_seen,
+                    tgt.last_seen = src.last_seen,
+                    tgt.views = src.views,
+                    tgt.clicks = src.clicks,
+                    tgt.add_to_cart = src.add_to_cart,
+                    tgt.begin_checkout = src.begin_checkout,
+                    tgt.purchases = src.purchases
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (session_id, product_id, first_seen, last_seen, views, clicks, add_to_cart, begin_checkout, purchases)
+                VALUES (src.session_id, src.product_id, src.first_seen, src.last_seen, src.views, src.clicks, src.add_to_cart, src.begin_checkout, src.purchases)
+            WHEN NOT MATCHED BY SOURCE THEN
+                DELETE;
+
+            ;WITH tgt AS (
+                SELECT s.*
+                FROM silver.sessions s
+                WHERE s.session_end >= :since_ts
+                   OR s.session_id IN (SELECT src.session_id FROM #sessions src)
+            )
+            MERGE tgt
+            USING #sessions AS src
+            ON tgt.session_id = src.session_id
+            WHEN MATCHED AND (
+                ISNULL(tgt.user_id, '') <> ISNULL(src.user_id, '')
+                OR tgt.session_start <> src.session_start
+                OR tgt.session_end <> src.session_end
+                OR tgt.events_count <> src.events_count
+            ) THEN
+                UPDATE SET
+                    tgt.user_id = src.user_id,
+                    tgt.session_start = src.session_start,
+                    tgt.session_end = src.session_end,
+                    tgt.duration_seconds = src.duration_seconds,
+                    tgt.events_count = src.events_count
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (session_id, user_id, session_start, session_end, duration_seconds, events_count)
+                VALUES (src.session_id, src.user_id, src.session_start, src.session_end, src.duration_seconds, src.events_count)
+            WHEN NOT MATCHED BY SOURCE THEN
+                DELETE;
+
+            DROP TABLE #session_events;
+            DROP TABLE #sessions;
+            DROP TABLE #session_products;
+
+            SELECT @rows;
             """
         ),
         {"since_ts": since_ts},
-    )
+    ).scalar_one()
 
+    rows = int(rows or 0)
     return rows if rows > 0 else 0
 
 
+def build_silver_user_sessions(conn) -> None:
+    conn.execute(text("""
+            IF OBJECT_ID('tempdb..#pv') IS NOT NULL DROP TABLE #pv;
+            IF OBJECT_ID('tempdb..#ce') IS NOT NULL DROP TABLE #ce;
+
+            -- Materialize the per-session page-view and click rollups once so the
+            -- window scans are not re-inlined into the MERGE plan.
+            ;WITH pv_ordered AS (
+                SELECT
+                    session_id,
+                    user_id,
+                    event_timestamp,
+                    page_url,
+                    utm_source,
+                    utm_medium,
+                    utm_campaign,
+                    ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY event_timestamp) AS rn_asc,
+                    ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY event_timestamp DESC) AS rn_desc
+                FROM bronze.page_view_events
+                WHERE session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> ''
+            )
+            SELECT
+                session_id,
+                MAX(user_id) AS user_id,
+                MIN(event_timestamp) AS pv_start_time,
+                MAX(event_timestamp) AS pv_end_time,
+                COUNT(*) AS page_views,
+                MAX(CASE WHEN rn_asc = 1 THEN page_url END) AS entry_page,
+                MAX(CASE WHEN rn_desc = 1 THEN page_url END) AS exit_page,
+                MAX(CASE WHEN rn_asc = 1 THEN utm_source END) AS utm_source,
+                MAX(CASE WHEN rn_asc = 1 THEN utm_medium END) AS utm_medium,
+                MAX(CASE WHEN rn_asc = 1 THEN utm_campaign END) AS utm_campaign
+            INTO #pv
+            FROM pv_ordered
+            GROUP BY session_id;
+            CREATE UNIQUE CLUSTERED INDEX CX_pv ON #pv (session_id);
+
+            SELECT
+                session_id,
+                MIN(event_timestamp) AS click_start_time,
+                MAX(event_timestamp) AS click_end_time,
+                COUNT(*) AS clicks
+            INTO #ce
+            FROM bronze.click_events
+            WHERE session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> ''
+            GROUP BY session_id;
+            CREATE UNIQUE CLUSTERED INDEX CX_ce ON #ce (session_id);
+
+            ;WITH bounds AS (
+                SELECT
+                    pv.session_id,
+                    pv.user_id,
+                    CASE
+                        WHEN ce.click_start_time IS NULL THEN pv.pv_start_time
+                        WHEN pv.pv_start_time <= ce.click_start_time THEN pv.pv_start_time
+                        ELSE ce.click_start_time
+                    END AS start_time,
+                    CASE
+                        WHEN ce.click_end_time IS NULL THEN pv.pv_end_time
+                        WHEN pv.pv_end_time >= ce.click_end_time THEN pv.pv_end_time
+                        ELSE ce.click_end_time
+                    END AS end_time,
+                    pv.page_views,
+                    ISNULL(ce.clicks, 0) AS clicks,
+                    pv.entry_page,
+                    pv.exit_page,
+                    pv.utm_source,
+                    pv.utm_medium,
+                    pv.utm_campaign
+                FROM #pv pv
+                LEFT JOIN #ce ce ON pv.session_id = ce.session_id
+            )
+            MERGE silver.user_sessions AS tgt
+            USING (
+                SELECT
+                    session_id,
+                    user_id,
+                    start_time,
+                    end_time,
+                    CASE
+                        WHEN DATEDIFF(SECOND, start_time, end_time) < 0 THEN 0
+                        ELSE DATEDIFF(SECOND, start_time, end_time)
+                    END AS duration_seconds,
+                    page_views,
+                    clicks,
+                    entry_page,
+                    exit_page,
+                    utm_source,
+                    utm_medium,
+                    utm_campaign
+                FROM bounds
+            ) AS src
+            ON tgt.session_id = src.session_id
+            WHEN MATCHED THEN
+                UPDATE SET
+                    tgt.user_id = src.user_id,
+                    tgt.start_time = src.start_time,
+                    tgt.end_time = src.end_time,
+                    tgt.duration_seconds = src.duration_seconds,
+                    tgt.page_views = src.page_views,
+                    tgt.clicks = src.clicks,
+                    tgt.entry_page = src.entry_page,
+                    tgt.exit_page = src.exit_page,
+                    tgt.utm_source = src.utm_source,
+                    tgt.utm_medium = src.utm_medium,
+                    tgt.utm_campaign = src.utm_campaign
+            WHEN NOT MATCHED THEN
+                INSERT (
+                    session_id, user_id, start_time, end_time, duration_seconds,
+                    page_views, clicks, entry_page, exit_page, utm_source, utm_medium, utm_campaign
+                )
+                VALUES (
+                    src.session_id, src.user_id, src.start_time, src.end_time, src.duration_seconds,
+                    src.page_views, src.clicks, src.entry_page, src.exit_page, src.utm_source, src.utm_medium, src.utm_campaign
+                );
+
+            DROP TABLE #pv;
+            DROP TABLE #ce;
+            """))
+
+
+def build_silver_page_sequence(conn, *, full_refresh: bool = False) -> None:
+    # Renumber only sessions with page views since the page_sequence watermark.
+    since_pages = _watermark_since(conn, "silver.page_sequence", full_refresh=full_refresh)
+    conn.execute(
+        text("""
+            IF OBJECT_ID('tempdb..#touched_sessions') IS NOT NULL DROP TABLE #touched_sessions;
+            CREATE TABLE #touched_sessions(session_id varchar(64) NOT NULL PRIMARY KEY);
+            """)
+    )
+    conn.execute(
+        text("""
+            INSERT INTO #touched_sessions (session_id)
+            SELECT DISTINCT session_id
+            FROM bronze.page_view_events
+            WHERE event_timestamp >= :since
+              AND session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> '';
+
+            DELETE ps
+            FROM silver.page_sequence ps
+            INNER JOIN #touched_sessions t ON ps.session_id = t.session_id;
+
+            INSERT INTO silver.page_sequence (session_id, step_number, page_url, event_timestamp)
+            SELECT
+                pv.session_id,
+                ROW_NUMBER() OVER (PARTITION BY pv.session_id ORDER BY pv.event_timestamp) AS step_number,
+                pv.page_url,
+                pv.event_timestamp
+            FROM bronze.page_view_events pv
+            INNER JOIN #touched_sessions t ON pv.session_id = t.session_id;
+
+            DROP TABLE #touched_sessions;
+            """),
+        {"since": since_pages},
+    )
+
+
+def build_silver_product_interactions(conn, *, since: datetime) -> None:
+    conn.execute(
+        text(
+            "DELETE FROM silver.product_interactions WHERE event_timestamp >= :since;"
+        ),
+        {"since": since},
+    )
+    conn.execute(
+        text(
+            """
+            ;WITH views AS (
+                SELECT
+                    pv.event_timestamp,
+                    pv.session_id,
+                    pv.user_id,
+                    COALESCE(
+                        JSON_VALUE(pv.properties, '$.product_id'),
+                        CASE
+                            WHEN pv.page_url LIKE '/products/%'
+                            THEN RIGHT(pv.page_url, CHARINDEX('/', REVERSE(pv.page_url)) - 1)
+                            ELSE NULL
+                        END
+                    ) AS product_id,
+                    'view' AS interaction_type,
+                    pv.properties
+            FROM bronze.page_view_events pv
+            WHERE pv.event_timestamp >= :since
+              AND pv.page_url LIKE '/products/%'
+              AND pv.session_id IS NOT NULL AND LTRIM(RTRIM(pv.session_id)) <> ''
+            ),
+            clicks AS (
+                SELECT
+                    ce.event_timestamp,
+                    ce.session_id,
+                    ce.user_id,
+                    COALESCE(
+                        JSON_VALUE(ce.properties, '$.product_id'),
+                        CASE
+                            WHEN ce.page_url LIKE '/products/%'
+                            THEN RIGHT(ce.page_url, CHARINDEX('/', REVERSE(ce.page_url)) - 1)
+                            ELSE NULL
+                        END
+                    ) AS product_id,
+                    CASE
+                        WHEN ce.element_id = 'btn_add_to_cart' THEN 'add_to_cart'
+                        WHEN COALESCE(JSON_VALUE(ce.properties, '$.interaction_type'), '') = 'add_to_cart' THEN 'add_to_cart'
+                        ELSE 'click'
+                    END AS interaction_type,
+                    ce.properties
+            FROM bronze.click_events ce
+            WHERE ce.event_timestamp >= :since
+              AND ce.page_url LIKE '/products/%'
+              AND ce.session_id IS NOT NULL AND LTRIM(RTRIM(ce.session_id)) <> ''
+            ),
+            src AS (
+                SELECT event_timestamp, session_id, user_id, product_id, interaction_type, properties FROM views
+                UNION ALL
+                SELECT event_timestamp, session_id, user_id, product_id, interaction_type, properties FROM clicks
+            )
+            -- DISTINCT collapses exact duplicate bronze rows: only collector rows carry a
+            -- _meta.event_id in properties, seeded rows (and NULL properties) do not.
+            INSERT INTO silver.product_interactions
+                (event_timestamp, session_id, user_id, product_id, interaction_type, properties)
+            SELECT DISTINCT
+                event_timestamp,
+                session_id,
+                user_id,
+                product_id,
+                interaction_type,
+                properties
+            FROM src
+            WHERE product_id IS NOT NULL;
+            """
+        ),
+        {"since": since},
+    )
+
+
+def _prepare_silver_schema(conn) -> None:
+    # Idempotent DDL the builds rely on, committed up front: running it inside the
+    # concurrent sub-pipelines would take schema locks on the bronze tables they read.
+    _ensure_behavior_tables(conn)
+    ensure_bronze_derived_columns(conn)
+    if not _table_exists(conn, "bronze.tracker_events"):
+        _ensure_bronze_web_union(conn)
+    _ensure_session_fact_tables(conn)
+    ensure_seed_flag_columns(conn)
+    _ensure_session_events_window_index(conn)
+    ensure_business_events_window_index(conn)
+    _ensure_canonical_event_type_fn(conn)
+
+
+def _in_transaction(engine, build, **kwargs):
+    with engine.begin() as conn:
+        return build(conn, **kwargs)
+
+
 def main() -> int:
     args = _parse_args()
     settings = load_settings()
     engine = get_engine(settings)
 
-    recent_days = _env_int("ETL_RECENT_DAYS", 30)
+    recent_days = _recent_days()
     since_interactions = to_sqlserver_utc_naive(utc_now() - timedelta(days=min(7, recent_days)))
 
+    with engine.begin() as conn:
+        _prepare_silver_schema(conn)
+
     with engine.begin() as conn:
         run = start_run(conn, "build_silver")
         try:
-            web_rows_inserted = build_silver_web_events(conn)
-
-            # Web/session silver tables (existing)
-            conn.execute(text("""
-                    ;WITH pv_ordered AS (
-                        SELECT
-                            session_id,
-                            user_id,
-                            event_timestamp,
-                            page_url,
-                            utm_source,
-                            utm_medium,
-                            utm_campaign,
-                            ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY event_timestamp) AS rn_asc,
-                            ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY event_timestamp DESC) AS rn_desc
-                        FROM bronze.page_view_events
-                        WHERE session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> ''
-                    ),
-                    pv AS (
-                        SELECT
-                            session_id,
-                            MAX(user_id) AS user_id,
-                            MIN(event_timestamp) AS pv_start_time,
-                            MAX(event_timestamp) AS pv_end_time,
-                            COUNT(*) AS page_views,
-                            MAX(CASE WHEN rn_asc = 1 THEN page_url END) AS entry_page,
-                            MAX(CASE WHEN rn_desc = 1 THEN page_url END) AS exit_page,
-                            MAX(CASE WHEN rn_asc = 1 THEN utm_source END) AS utm_source,
-                            MAX(CASE WHEN rn_asc = 1 THEN utm_medium END) AS utm_medium,
-                            MAX(CASE WHEN rn_asc = 1 THEN utm_campaign END) AS utm_campaign
-                        FROM pv_ordered
-                        GROUP BY session_id
-                    ),
-                    ce AS (
-                        SELECT
-                            session_id,
-                            MIN(event_timestamp) AS click_start_time,
-                            MAX(event_timestamp) AS click_end_time,
-                            COUNT(*) AS clicks
-                        FROM bronze.click_events
-                        WHERE session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> ''
-                        GROUP BY session_id
-                    ),
-                    bounds AS (
-                        SELECT
-                            pv.session_id,
-                            pv.user_id,
-                            CASE
-                                WHEN ce.click_start_time IS NULL THEN pv.pv_start_time
-                                WHEN pv.pv_start_time <= ce.click_start_time THEN pv.pv_start_time
-                                ELSE ce.click_start_time
-                            END AS start_time,
-                            CASE
-                                WHEN ce.click_end_time IS NULL THEN pv.pv_end_time
-                                WHEN pv.pv_end_time >= ce.click_end_time THEN pv.pv_end_time
-                                ELSE ce.click_end_time
-                            END AS end_time,
-                            pv.page_views,
-                            ISNULL(ce.clicks, 0) AS clicks,
-                            pv.entry_page,
-                            pv.exit_page,
-                            pv.utm_source,
-                            pv.utm_medium,
-                            pv.utm_campaign
-                        FROM pv
-                        LEFT JOIN ce ON pv.session_id = ce.session_id
-                    )
-                    MERGE silver.user_sessions AS tgt
-                    USING (
-                        SELECT
-                            session_id,
-                            user_id,
-                            start_time,
-                            end_time,
-                            CASE
-                                WHEN DATEDIFF(SECOND, start_time, end_time) < 0 THEN 0
-                                ELSE DATEDIFF(SECOND, start_time, end_time)
-                            END AS duration_seconds,
-                            page_views,
-                            clicks,
-                            entry_page,
-                            exit_page,
-                            utm_source,
-                            utm_medium,
-                            utm_campaign
-                        FROM bounds
-                    ) AS src
-                    ON tgt.session_id = src.session_id
-                    WHEN MATCHED THEN
-                        UPDATE SET
-                            tgt.user_id = src.user_id,
-                            tgt.start_time = src.start_time,
-                            tgt.end_time = src.end_time,
-                            tgt.duration_seconds = src.duration_seconds,
-                            tgt.page_views = src.page_views,
-                            tgt.clicks = src.clicks,
-                            tgt.entry_page = src.entry_page,
-                            tgt.exit_page = src.exit_page,
-                            tgt.utm_source = src.utm_source,
-                            tgt.utm_medium = src.utm_medium,
-                            tgt.utm_campaign = src.utm_campaign
-                    WHEN NOT MATCHED THEN
-                        INSERT (
-                            session_id, user_id, start_time, end_time, duration_seconds,
-                            page_views, clicks, entry_page, exit_page, utm_source, utm_medium, utm_campaign
-                        )
-                        VALUES (
-                            src.session_id, src.user_id, src.start_time, src.end_time, src.duration_seconds,
-                            src.page_views, src.clicks, src.entry_page, src.exit_page, src.utm_source, src.utm_medium, src.utm_campaign
-                        );
-                    """))
-
-            conn.execute(text("DELETE FROM silver.page_sequence;"))
-            conn.execute(text("""
-                    INSERT INTO silver.page_sequence (session_id, step_number, page_url, event_timestamp)
-                    SELECT
-                        session_id,
-                        ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY event_timestamp) AS step_number,
-                        page_url,
-                        event_timestamp
-                    FROM bronze.page_view_events
-                    WHERE session_id IS NOT NULL AND LTRIM(RTRIM(session_id)) <> '';
-                    """))
-
-            conn.execute(
-                text(
-                    "DELETE FROM silver.product_interactions WHERE event_timestamp >= :since;"
-                ),
-                {"since": since_interactions},
-            )
-            conn.execute(
-                text(
-                    """
-                    ;WITH views AS (
-                        SELECT
-                            pv.event_timestamp,
-                            pv.session_id,
-                            pv.user_id,
-                            COALESCE(
-                                JSON_VALUE(pv.properties, '$.product_id'),
-                                CASE
-                                    WHEN pv.page_url LIKE '/products/%'
-                                    THEN RIGHT(pv.page_url, CHARINDEX('/', REVERSE(pv.page_url)) - 1)
-                                    ELSE NULL
-                                END
-                            ) AS product_id,
-                            'view' AS interaction_type,
-                            pv.properties
-                    FROM bronze.page_view_events pv
-                    WHERE pv.event_timestamp >= :since
-                      AND pv.page_url LIKE '/products/%'
-                      AND pv.session_id IS NOT NULL AND LTRIM(RTRIM(pv.session_id)) <> ''
+            # The web sub-pipelines write disjoint silver tables, so each runs and
+            # commits on its own connection; business tables follow on this one.
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                web_future = pool.submit(
+                    _in_transaction, engine, build_silver_web_events, full_refresh=args.full_refresh
+                )
+                futures = [
+                    web_future,
+                    pool.submit(_in_transaction, engine, build_silver_user_sessions),
+                    pool.submit(
+                        _in_transaction, engine, build_silver_page_sequence, full_refresh=args.full_refresh
                     ),
-                    clicks AS (
-                        SELECT
-                            ce.event_timestamp,
-                            ce.session_id,
-                            ce.user_id,
-                            COALESCE(
-                                JSON_VALUE(ce.properties, '$.product_id'),
-                                CASE
-                                    WHEN ce.page_url LIKE '/products/%'
-                                    THEN RIGHT(ce.page_url, CHARINDEX('/', REVERSE(ce.page_url)) - 1)
-                                    ELSE NULL
-                                END
-                            ) AS product_id,
-                            CASE
-                                WHEN ce.element_id = 'btn_add_to_cart' THEN 'add_to_cart'
-                                WHEN COALESCE(JSON_VALUE(ce.properties, '$.interaction_type'), '') = 'add_to_cart' THEN 'add_to_cart'
-                                ELSE 'click'
-                            END AS interaction_type,
-                            ce.properties
-                    FROM bronze.click_events ce
-                    WHERE ce.event_timestamp >= :since
-                      AND ce.page_url LIKE '/products/%'
-                      AND ce.session_id IS NOT NULL AND LTRIM(RTRIM(ce.session_id)) <> ''
+                    pool.submit(
+                        _in_transaction, engine, build_silver_product_interactions, since=since_interactions
                     ),
-                    src AS (
-                        SELECT event_timestamp, session_id, user_id, product_id, interaction_type, properties FROM views
-                        UNION ALL
-                        SELECT event_timestamp, session_id, user_id, product_id, interaction_type, properties FROM clicks
-                    )
-                    INSERT INTO silver.product_interactions
-                        (event_timestamp, session_id, user_id, product_id, interaction_type, properties)
-                    SELECT DISTINCT
-                        event_timestamp,
-                        session_id,
-                        user_id,
-                        product_id,
-                        interaction_type,
-                        properties
-                    FROM src
-                    WHERE product_id IS NOT NULL;
-                    """
-                ),
-                {"since": since_interactions},
-            )
+                ]
+                for future in as_completed(futures):
+                    future.result()
+            web_rows_inserted = web_future.result()
 
             # Business silver tables from bronze.business_events (recompute window)
             since = to_sqlserver_utc_naive(utc_now() - timedelta(days=int(args.days)))
+            # Date bound on the persisted event_date lets date-partitioned bronze tables
+            # eliminate partitions; event_timestamp alone does not.
+            since_date = since.date()
 
+            # Streamed in fixed-size chunks instead of buffering the whole window. Nothing
+            # else may run on this connection until the loop finishes, so dead letters
+            # are collected and written afterwards.
             src_rows = conn.execute(
-                text("""
+                text(f"""
                     SELECT
-                        event_timestamp,
-                        correlation_id,
-                        service,
-                        event_type,
-                        user_id,
-                        entity_id,
-                        payload
-                    FROM bronze.business_events
-                    WHERE event_timestamp >= :since
-                    ORDER BY event_timestamp ASC;
-                """),
-                {"since": since},
+                        be.event_timestamp,
+                        be.correlation_id,
+                        be.service,
+                        be.event_type,
+                        c.canon,
+                        be.user_id,
+                        be.entity_id,
+                        CAST(CASE WHEN p.payload IS NULL THEN 0 ELSE 1 END AS bit) AS payload_ok,
+                        CASE
+                            WHEN p.payload IS NULL OR c.canon = 'review_created' THEN LEFT(be.payload, 4000)
+                        END AS payload_head,
+                        j.*
+                    FROM bronze.business_events be
+                    CROSS APPLY silver.fn_canonical_event_type(be.event_type) c
+                    CROSS APPLY (SELECT CASE WHEN ISJSON(be.payload) = 1 THEN be.payload END AS payload) p
+                    CROSS APPLY (
+                        SELECT
+                            LEFT({_payload_pick_sql("p.payload", ("order_id", "orderId", "id"))}, 64) AS p_order_id,
+                            LEFT({_payload_pick_sql("p.payload", ("payment_id", "paymentId", "id"))}, 64) AS p_payment_id,
+                            LEFT({_payload_pick_sql("p.payload", ("review_id", "reviewId", "id"))}, 64) AS p_review_id,
+                            LEFT({_payload_pick_sql("p.payload", ("product_id", "productId", "sku"))}, 64) AS p_product_id,
+                            {_payload_pick_sql("p.payload", ("total_amount", "totalAmount", "total", "amount", "revenue"), "TRY_CONVERT(decimal(12,2), {})")} AS p_amount,
+                            LEFT({_payload_pick_sql("p.payload", ("currency", "currency_code", "currencyCode"))}, 10) AS p_currency,
+                            LEFT({_payload_pick_sql("p.payload", ("provider", "gateway", "payment_provider", "paymentProvider"))}, 50) AS p_provider,
+                            {_payload_pick_sql("p.payload", ("rating", "stars", "score"), "TRY_CONVERT(int, {})")} AS p_rating,
+                            LEFT({_payload_pick_sql("p.payload", ("comment", "message", "text", "review"))}, 1000) AS p_comment
+                    ) j
+                    WHERE be.event_timestamp >= :since
+                      AND be.event_date >= :since_date
+                      AND (
+                          p.payload IS NULL
+                          OR c.canon IN ('payment_failed', 'refund_created', 'review_created')
+                          OR LOWER(be.event_type) LIKE 'payment%'
+                          OR LOWER(be.event_type) LIKE 'refund%'
+                      )
+                    ORDER BY be.event_timestamp ASC;
+                """).execution_options(yield_per=10000),
+                {"since": since, "since_date": since_date},
             ).mappings()
 
-            orders: dict[str, dict[str, object]] = {}
-            order_item_payloads: dict[str, tuple[datetime, object]] = {}
+            dead_letters: list[tuple[str, str, dict[str, object]]] = []
             payments: list[dict[str, object]] = []
             reviews: list[dict[str, object]] = []
 
+            # Payload fields arrive pre-extracted (p_* columns).
             for r in src_rows:
-                payload_raw = str(r.get("payload") or "")
-                payload_obj = parse_json_payload(payload_raw)
-                if payload_obj is None:
-                    insert_dead_letter(
-                        conn,
-                        source=str(r.get("service") or "silver")[:50],
-                        reason="silver_parse_failed",
-                        payload={
-                            "event_timestamp": str(r.get("event_timestamp")),
-                            "correlation_id": r.get("correlation_id"),
-                            "service": r.get("service"),
-                            "event_type": r.get("event_type"),
-                            "user_id": r.get("user_id"),
-                            "entity_id": r.get("entity_id"),
-                            "payload": payload_raw[:4000],
-                        },
+                if not r["payload_ok"]:
+                    dead_letters.append(
+                        (
+                            str(r.get("service") or "silver")[:50],
+                            "silver_parse_failed",
+                            {
+                                "event_timestamp": str(r.get("event_timestamp")),
+                                "correlation_id": r.get("correlation_id"),
+                                "service": r.get("service"),
+                                "event_type": r.get("event_type"),
+                                "user_id": r.get("user_id"),
+                                "entity_id": r.get("entity_id"),
+                                "payload": str(r.get("payload_head") or ""),
+                            },
+                        )
                     )
                     continue
 
                 raw_event_type = str(r.get("event_type") or "")
-                canon = canonical_event_type(raw_event_type)
+                canon = str(r.get("canon") or "unknown")
 
                 ts_db = r["event_timestamp"]
                 ts = ensure_utc(ts_db)
+                ts_iso = ts.isoformat()
                 ts_naive = to_sqlserver_utc_naive(ts)
 
                 correlation_id = r.get("correlation_id")
                 service = r.get("service")
                 user_id = r.get("user_id")
                 entity_id = r.get("entity_id")
-
-                # Orders
-                if canon in {"order_created", "order_cancelled", "order_paid", "refund_created"}:
-                    order_id = best_effort_order_id(
-                        str(entity_id) if entity_id else None, payload_obj
-                    )
-                    if order_id:
-                        state = orders.setdefault(
-                            order_id,
-                            {
-                                "order_id": order_id,
-                                "first_seen_at": ts_naive,
-                                "created_at": None,
-                                "updated_at": ts_naive,
-                                "status": "created",
-                                "status_ts": None,
-                                "user_id": None,
-                                "currency": None,
-                                "total_amount": None,
-                                "correlation_id": None,
-                                "source_service": None,
-                            },
-                        )
-
-                        state["first_seen_at"] = min(
-                            state["first_seen_at"], ts_naive  # type: ignore[arg-type]
-                        )
-                        state["updated_at"] = max(
-                            state["updated_at"], ts_naive  # type: ignore[arg-type]
-                        )
-                        if user_id:
-                            state["user_id"] = str(user_id)[:64]
-                        if correlation_id:
-                            state["correlation_id"] = str(correlation_id)[:64]
-                        if service:
-                            state["source_service"] = str(service)[:64]
-
-                        if canon == "order_created":
-                            ca = state.get("created_at")
-                            state["created_at"] = ts_naive if ca is None else min(ca, ts_naive)  # type: ignore[arg-type]
-
-                        status_map = {
-                            "order_created": "created",
-                            "order_paid": "paid",
-                            "order_cancelled": "cancelled",
-                            "refund_created": "refunded",
-                        }
-                        new_status = status_map.get(canon)
-                        if new_status:
-                            prev_ts = state.get("status_ts")
-                            if prev_ts is None or ts_naive >= prev_ts:  # type: ignore[operator]
-                                state["status"] = new_status
-                                state["status_ts"] = ts_naive
-
-                        amt = best_effort_amount(payload_obj)
-                        cur = best_effort_currency(payload_obj)
-                        if amt is not None:
-                            state["total_amount"] = amt
-                        if cur is not None:
-                            state["currency"] = cur
-
-                        # Track latest payload containing items for this order
-                        items = normalize_items(payload_obj)
-                        if items:
-                            prev = order_item_payloads.get(order_id)
-                            if prev is None or ts_naive >= prev[0]:
-                                order_item_payloads[order_id] = (ts_naive, payload_obj)
+                corr_trunc = str(correlation_id)[:64] if correlation_id else None
+                user_trunc = str(user_id)[:64] if user_id else None
 
                 # Payments (prefer explicit payment/refund events, or anything carrying payment_id)
-                if canon in {"payment_failed", "refund_created"} or raw_event_type.lower().startswith("payment") or raw_event_type.lower().startswith("refund"):
-                    payment_id = best_effort_payment_id(payload_obj)
-                    order_id = best_effort_order_id(None, payload_obj)
+                raw_lower = raw_event_type.lower()
+                if canon in _PAYMENT_EVENTS or raw_lower.startswith(("payment", "refund")):
+                    payment_id = r.get("p_payment_id")
+                    order_id = r.get("p_order_id")
                     occurred_at = ts_naive
 
                     if not payment_id:
-                        seed = f"{correlation_id or ''}|{canon}|{ensure_utc(ts_db).isoformat()}|{order_id or ''}"
+                        seed = f"{correlation_id or ''}|{canon}|{ts_iso}|{order_id or ''}"
                         payment_id = deterministic_id(seed, max_len=64)
 
-                    pay_status = "succeeded"
-                    if canon == "payment_failed":
-                        pay_status = "failed"
-                    if canon == "refund_created":
-                        pay_status = "refunded"
+                    pay_status = _PAYMENT_STATUS.get(canon, "succeeded")
 
                     payments.append(
                         {
                             "payment_id": payment_id[:64],
-                            "order_id": order_id[:64] if order_id else None,
-                            "user_id": str(user_id)[:64] if user_id else None,
+                            "order_id": order_id,
+                            "user_id": user_trunc,
                             "status": pay_status,
-                            "amount": best_effort_amount(payload_obj),
-                            "currency": best_effort_currency(payload_obj),
-                            "provider": best_effort_provider(payload_obj),
+                            "amount": r.get("p_amount"),
+                            "currency": r.get("p_currency"),
+                            "provider": r.get("p_provider"),
                             "occurred_at": occurred_at,
-                            "correlation_id": str(correlation_id)[:64]
-                            if correlation_id
-                            else None,
+                            "correlation_id": corr_trunc,
                             "source_service": str(service)[:64] if service else None,
                         }
                     )
 
                 # Reviews
                 if canon == "review_created":
-                    product_id = best_effort_product_id(payload_obj)
-                    rating = best_effort_rating(payload_obj)
+                    product_id = r.get("p_product_id")
+                    rating = r.get("p_rating")
                     if not product_id or rating is None:
-                        insert_dead_letter(
-                            conn,
-                            source=str(service or "silver")[:50],
-                            reason="silver_review_missing_fields",
-                            payload={
-                                "event_timestamp": str(ts_db),
-                                "event_type": raw_event_type,
-                                "entity_id": entity_id,
-                                "product_id": product_id,
-                                "rating": rating,
-                                "payload": payload_raw[:4000],
-                            },
+                        dead_letters.append(
+                            (
+                                str(service or "silver")[:50],
+                                "silver_review_missing_fields",
+                                {
+                                    "event_timestamp": str(ts_db),
+                                    "event_type": raw_event_type,
+                                    "entity_id": entity_id,
+                                    "product_id": product_id,
+                                    "rating": rating,
+                                    "payload": str(r.get("payload_head") or ""),
+                                },
+                            )
                         )
                         continue
 
-                    review_id = best_effort_review_id(None, payload_obj)
+                    review_id = r.get("p_review_id")
                     if not review_id and entity_id and str(entity_id) != product_id:
                         review_id = str(entity_id)
                     if not review_id:
-                        seed = f"{product_id}|{user_id or ''}|{rating}|{ensure_utc(ts_db).isoformat()}"
+                        seed = f"{product_id}|{user_id or ''}|{rating}|{ts_iso}"
                         review_id = deterministic_id(seed, max_len=64)
 
                     reviews.append(
                         {
                             "review_id": review_id[:64],
-                            "product_id": product_id[:64],
-                            "user_id": str(user_id)[:64] if user_id else None,
+                            "product_id": product_id,
+                            "user_id": user_trunc,
                             "rating": int(rating),
-                            "comment": best_effort_comment(payload_obj),
+                            "comment": r.get("p_comment"),
                             "created_at": ts_naive,
-                            "correlation_id": str(correlation_id)[:64]
-                            if correlation_id
-                            else None,
+                            "correlation_id": corr_trunc,
                         }
                     )
 
-            # Finalize orders with fallbacks
-            order_rows: list[dict[str, object]] = []
-            for oid, st in orders.items():
-                created_at = st.get("created_at") or st.get("first_seen_at")
-                updated_at = st.get("updated_at") or created_at
-                order_rows.append(
-                    {
-                        "order_id": oid,
-                        "user_id": st.get("user_id"),
-                        "created_at": created_at,
-                        "status": st.get("status") or "created",
-                        "currency": st.get("currency"),
-                        "total_amount": st.get("total_amount"),
-                        "correlation_id": st.get("correlation_id"),
-                        "source_service": st.get("source_service"),
-                        "updated_at": updated_at,
-                    }
-                )
+            insert_dead_letters(conn, dead_letters)
 
-            rows_inserted = 0
-
-            # Upsert orders
-            if order_rows:
-                for i in range(0, len(order_rows), 500):
-                    batch = order_rows[i : i + 500]
-                    ids = [str(x["order_id"]) for x in batch]
-                    existing = _existing_ids(conn, "silver.orders", "order_id", ids)
-
-                    inserts = [x for x in batch if str(x["order_id"]) not in existing]
-                    updates = [x for x in batch if str(x["order_id"]) in existing]
-
-                    if inserts:
-                        res = conn.execute(
-                            text(
-                                """
-                                INSERT INTO silver.orders
-                                    (order_id, user_id, created_at, status, currency, total_amount, correlation_id, source_service, updated_at)
-                                VALUES
-                                    (:order_id, :user_id, :created_at, :status, :currency, :total_amount, :correlation_id, :source_service, :updated_at);
-                                """
-                            ),
-                            inserts,
-                        )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
-
-                    if updates:
-                        res = conn.execute(
-                            text(
-                                """
-                                UPDATE silver.orders
-                                SET
-                                    user_id = COALESCE(:user_id, user_id),
-                                    created_at = CASE WHEN created_at <= :created_at THEN created_at ELSE :created_at END,
-                                    status = CASE WHEN updated_at <= :updated_at THEN :status ELSE status END,
-                                    currency = CASE WHEN updated_at <= :updated_at THEN COALESCE(:currency, currency) ELSE currency END,
-                                    total_amount = CASE WHEN updated_at <= :updated_at THEN COALESCE(:total_amount, total_amount) ELSE total_amount END,
-                                    correlation_id = COALESCE(:correlation_id, correlation_id),
-                                    source_service = COALESCE(:source_service, source_service),
-                                    updated_at = CASE WHEN updated_at >= :updated_at THEN updated_at ELSE :updated_at END
-                                WHERE order_id = :order_id;
-                                """
-                            ),
-                            updates,
-                        )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
-
-            # Recompute order_items for touched orders
-            if order_item_payloads:
-                touched_orders = list(order_item_payloads.keys())
-                deleted = 0
-                for i in range(0, len(touched_orders), 500):
-                    deleted += _delete_order_items(conn, touched_orders[i : i + 500])
-
-                item_rows: list[dict[str, object]] = []
-                for oid, (_ts, pobj) in order_item_payloads.items():
-                    for it in normalize_items(pobj):
-                        line_total = it.line_total
-                        if line_total is None and it.unit_price is not None:
-                            line_total = it.unit_price * it.quantity
-                        item_rows.append(
-                            {
-                                "order_id": oid,
-                                "product_id": it.product_id,
-                                "quantity": int(it.quantity),
-                                "unit_price": it.unit_price,
-                                "line_total": line_total,
-                            }
-                        )
+            # Upsert orders: one set-based MERGE over the recompute window. Latest
+            # non-null values are taken with MAX over a timestamp-prefixed string.
+            res = conn.execute(
+                text(
+                    f"""
+                    ;WITH ev AS (
+                        SELECT
+                            j.order_id,
+                            be.event_timestamp,
+                            c.canon,
+                            CONVERT(char(27), be.event_timestamp, 121) AS ts_key,
+                            LEFT(NULLIF(be.user_id, ''), 64) AS user_id,
+                            LEFT(NULLIF(be.correlation_id, ''), 64) AS correlation_id,
+                            LEFT(NULLIF(be.service, ''), 64) AS source_service,
+                            j.total_amount,
+                            j.currency
+                        FROM bronze.business_events be
+                        CROSS APPLY (SELECT CASE WHEN ISJSON(be.payload) = 1 THEN be.payload END AS payload) p
+                        CROSS APPLY silver.fn_canonical_event_type(be.event_type) c
+                        CROSS APPLY (
+                            SELECT
+                                LEFT(COALESCE({_payload_pick_sql("p.payload", ("order_id", "orderId", "id"))}, NULLIF(be.entity_id, '')), 64) AS order_id,
+                                {_payload_pick_sql("p.payload", ("total_amount", "totalAmount", "total", "amount", "revenue"), "TRY_CONVERT(decimal(12,2), {})")} AS total_amount,
+                                LEFT({_payload_pick_sql("p.payload", ("currency", "currency_code", "currencyCode"))}, 10) AS currency
+                        ) j
+                        WHERE be.event_timestamp >= :since
+                          AND be.event_date >= :since_date
+                          AND p.payload IS NOT NULL
+                          AND c.canon IN ('order_created', 'order_cancelled', 'order_paid', 'refund_created')
+                    ),
+                    agg AS (
+                        SELECT
+                            order_id,
+                            COALESCE(
+                                MIN(CASE WHEN canon = 'order_created' THEN event_timestamp END),
+                                MIN(event_timestamp)
+                            ) AS created_at,
+                            MAX(event_timestamp) AS updated_at,
+                            SUBSTRING(
+                                MAX(
+                                    ts_key
+                                    + CASE canon
+                                        WHEN 'order_created' THEN 'created'
+                                        WHEN 'order_paid' THEN 'paid'
+                                        WHEN 'order_cancelled' THEN 'cancelled'
+                                        ELSE 'refunded'
+                                    END
+                                ),
+                                28,
+                                32
+                            ) AS status,
+                            SUBSTRING(MAX(ts_key + user_id), 28, 64) AS user_id,
+                            SUBSTRING(MAX(ts_key + currency), 28, 10) AS currency,
+                            TRY_CONVERT(
+                                decimal(12,2),
+                                SUBSTRING(MAX(ts_key + CONVERT(varchar(40), total_amount)), 28, 40)
+                            ) AS total_amount,
+                            SUBSTRING(MAX(ts_key + correlation_id), 28, 64) AS correlation_id,
+                            SUBSTRING(MAX(ts_key + source_service), 28, 64) AS source_service
+                        FROM ev
+                        WHERE order_id IS NOT NULL
+                        GROUP BY order_id
+                    )
+                    MERGE silver.orders AS tgt
+                    USING agg AS src
+                    ON tgt.order_id = src.order_id
+                    WHEN MATCHED THEN
+                        UPDATE SET
+                            tgt.user_id = COALESCE(src.user_id, tgt.user_id),
+                            tgt.created_at = CASE WHEN tgt.created_at <= src.created_at THEN tgt.created_at ELSE src.created_at END,
+                            tgt.status = CASE WHEN tgt.updated_at <= src.updated_at THEN src.status ELSE tgt.status END,
+                            tgt.currency = CASE WHEN tgt.updated_at <= src.updated_at THEN COALESCE(src.currency, tgt.currency) ELSE tgt.currency END,
+                            tgt.total_amount = CASE WHEN tgt.updated_at <= src.updated_at THEN COALESCE(src.total_amount, tgt.total_amount) ELSE tgt.total_amount END,
+                            tgt.correlation_id = COALESCE(src.correlation_id, tgt.correlation_id),
+                            tgt.source_service = COALESCE(src.source_service, tgt.source_service),
+                            tgt.updated_at = CASE WHEN tgt.updated_at >= src.updated_at THEN tgt.updated_at ELSE src.updated_at END
+                    WHEN NOT MATCHED THEN
+                        INSERT (order_id, user_id, created_at, status, currency, total_amount, correlation_id, source_service, updated_at)
+                        VALUES (src.order_id, src.user_id, src.created_at, src.status, src.currency, src.total_amount, src.correlation_id, src.source_service, src.updated_at);
+                    """
+                ),
+                {"since": since, "since_date": since_date},
+            )
+            rows_inserted = int(getattr(res, "rowcount", 0) or 0)
 
-                if item_rows:
-                    res = conn.execute(
-                        text(
-                            """
-                            INSERT INTO silver.order_items (order_id, product_id, quantity, unit_price, line_total)
-                            VALUES (:order_id, :product_id, :quantity, :unit_price, :line_total);
-                            """
-                        ),
-                        item_rows,
+            # Recompute order_items for touched orders: explode the latest item-bearing
+            # payload per order in SQL (normalize_items semantics), then replace that
+            # order's rows.
+            conn.execute(
+                text(
+                    """
+                    IF OBJECT_ID('tempdb..#order_items_src') IS NOT NULL DROP TABLE #order_items_src;
+                    CREATE TABLE #order_items_src(
+                        order_id varchar(64) NOT NULL,
+                        product_id varchar(64) NOT NULL,
+                        quantity int NOT NULL,
+                        unit_price decimal(18,4) NULL,
+                        line_total decimal(18,4) NULL
+                    );
+                    """
+                )
+            )
+            item_counts = conn.execute(
+                text(
+                    f"""
+                    SET NOCOUNT ON;
+                    DECLARE @deleted int, @inserted int;
+
+                    ;WITH ev AS (
+                        SELECT
+                            be.event_id,
+                            be.event_timestamp,
+                            p.payload,
+                            LEFT(COALESCE({_payload_pick_sql("p.payload", ("order_id", "orderId", "id"))}, NULLIF(be.entity_id, '')), 64) AS order_id
+                        FROM bronze.business_events be
+                        CROSS APPLY silver.fn_canonical_event_type(be.event_type) c
+                        CROSS APPLY (SELECT CASE WHEN ISJSON(be.payload) = 1 THEN be.payload END AS payload) p
+                        WHERE be.event_timestamp >= :since
+                          AND be.event_date >= :since_date
+                          AND p.payload IS NOT NULL
+                          AND c.canon IN ('order_created', 'order_cancelled', 'order_paid', 'refund_created')
+                    ),
+                    list_items AS (
+                        SELECT
+                            ev.event_id,
+                            ev.event_timestamp,
+                            ev.order_id,
+                            f.product_id,
+                            f.quantity,
+                            f.unit_price,
+                            f.line_total
+                        FROM ev
+                        CROSS APPLY OPENJSON({_payload_items_array_sql("ev.payload")}) e
+                        CROSS APPLY (
+                            SELECT
+                                LEFT({_payload_pick_sql("e.value", ("product_id", "productId", "sku", "id"), containers=("",))}, 64) AS product_id,
+                                {_payload_pick_sql("e.value", ("quantity", "qty", "count"), "TRY_CONVERT(int, {})", containers=("",))} AS quantity,
+                                {_payload_pick_sql("e.value", ("unit_price", "unitPrice", "price"), "TRY_CONVERT(decimal(18,4), {})", containers=("",))} AS unit_price,
+                                {_payload_pick_sql("e.value", ("line_total", "lineTotal", "total"), "TRY_CONVERT(decimal(18,4), {})", containers=("",))} AS line_total
+                        ) f
+                        WHERE e.type = 5
+                          AND f.product_id IS NOT NULL
+                    ),
+                    root_items AS (
+                        SELECT
+                            ev.event_id,
+                            ev.event_timestamp,
+                            ev.order_id,
+                            f.product_id,
+                            f.quantity,
+                            f.unit_price,
+                            f.line_total
+                        FROM ev
+                        CROSS APPLY (
+                            SELECT
+                                LEFT({_payload_pick_sql("ev.payload", ("product_id", "productId", "sku"), containers=("",))}, 64) AS product_id,
+                                {_payload_pick_sql("ev.payload", ("quantity", "qty"), "TRY_CONVERT(int, {})", containers=("",))} AS quantity,
+                                {_payload_pick_sql("ev.payload", ("unit_price", "unitPrice", "price"), "TRY_CONVERT(decimal(18,4), {})", containers=("",))} AS unit_price,
+                                {_payload_pick_sql("ev.payload", ("line_total", "lineTotal", "total"), "TRY_CONVERT(decimal(18,4), {})", containers=("",))} AS line_total
+                        ) f
+                        WHERE f.product_id IS NOT NULL
+                          AND NOT EXISTS (SELECT 1 FROM list_items li WHERE li.event_id = ev.event_id)
+                    ),
+                    all_items AS (
+                        SELECT * FROM list_items
+                        UNION ALL
+                        SELECT * FROM root_items
+                    ),
+                    ranked AS (
+                        SELECT
+                            *,
+                            DENSE_RANK() OVER (
+                                PARTITION BY order_id
+                                ORDER BY event_timestamp DESC, event_id DESC
+                            ) AS rk
+                        FROM all_items
+                        WHERE order_id IS NOT NULL
                     )
-                    rows_inserted += int(getattr(res, "rowcount", 0) or 0)
-                rows_inserted += deleted
+                    INSERT INTO #order_items_src (order_id, product_id, quantity, unit_price, line_total)
+                    SELECT
+                        order_id,
+                        product_id,
+                        CASE WHEN quantity >= 1 THEN quantity ELSE 1 END,
+                        unit_price,
+                        COALESCE(line_total, unit_price * CASE WHEN quantity >= 1 THEN quantity ELSE 1 END)
+                    FROM ranked
+                    WHERE rk = 1;
 
-            # Upsert payments
+                    DELETE oi
+                    FROM silver.order_items oi
+                    WHERE EXISTS (SELECT 1 FROM #order_items_src s WHERE s.order_id = oi.order_id);
+                    SET @deleted = @@ROWCOUNT;
+
+                    INSERT INTO silver.order_items (order_id, product_id, quantity, unit_price, line_total)
+                    SELECT order_id, product_id, quantity, unit_price, line_total
+                    FROM #order_items_src;
+                    SET @inserted = @@ROWCOUNT;
+
+                    DROP TABLE #order_items_src;
+
+                    SELECT @deleted AS deleted, @inserted AS inserted;
+                    """
+                ),
+                {"since": since, "since_date": since_date},
+            ).mappings().one()
+            rows_inserted += int(item_counts["deleted"] or 0) + int(item_counts["inserted"] or 0)
+
+            # Upsert payments and reviews: stage each list into a temp table with one
+            # executemany, then reconcile with a single MERGE. Repeated ids within the
+            # window collapse to their latest event before merging.
             if payments:
-                for i in range(0, len(payments), 500):
-                    batch = payments[i : i + 500]
-                    ids = [str(x["payment_id"]) for x in batch]
-                    existing = _existing_ids(conn, "silver.payments", "payment_id", ids)
-
-                    inserts = [x for x in batch if str(x["payment_id"]) not in existing]
-                    updates = [x for x in batch if str(x["payment_id"]) in existing]
-
-                    if inserts:
-                        res = conn.execute(
-                            text(
-                                """
-                                INSERT INTO silver.payments
-                                    (payment_id, order_id, user_id, status, amount, currency, provider, occurred_at, correlation_id, source_service)
-                                VALUES
-                                    (:payment_id, :order_id, :user_id, :status, :amount, :currency, :provider, :occurred_at, :correlation_id, :source_service);
-                                """
-                            ),
-                            inserts,
-                        )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
-
-                    if updates:
-                        res = conn.execute(
-                            text(
-                                """
-                                UPDATE silver.payments
-                                SET
-                                    order_id = COALESCE(:order_id, order_id),
-                                    user_id = COALESCE(:user_id, user_id),
-                                    status = CASE WHEN occurred_at <= :occurred_at THEN :status ELSE status END,
-                                    amount = CASE WHEN occurred_at <= :occurred_at THEN COALESCE(:amount, amount) ELSE amount END,
-                                    currency = CASE WHEN occurred_at <= :occurred_at THEN COALESCE(:currency, currency) ELSE currency END,
-                                    provider = CASE WHEN occurred_at <= :occurred_at THEN COALESCE(:provider, provider) ELSE provider END,
-                                    occurred_at = CASE WHEN occurred_at >= :occurred_at THEN occurred_at ELSE :occurred_at END,
-                                    correlation_id = COALESCE(:correlation_id, correlation_id),
-                                    source_service = COALESCE(:source_service, source_service)
-                                WHERE payment_id = :payment_id;
-                                """
-                            ),
-                            updates,
+                conn.execute(
+                    text(
+                        """
+                        IF OBJECT_ID('tempdb..#payments_stage') IS NOT NULL DROP TABLE #payments_stage;
+                        CREATE TABLE #payments_stage(
+                            payment_id varchar(64) NOT NULL,
+                            order_id varchar(64) NULL,
+                            user_id varchar(64) NULL,
+                            status varchar(32) NOT NULL,
+                            amount decimal(12,2) NULL,
+                            currency varchar(10) NULL,
+                            provider varchar(50) NULL,
+                            occurred_at datetime2 NOT NULL,
+                            correlation_id varchar(64) NULL,
+                            source_service varchar(64) NULL
+                        );
+                        """
+                    )
+                )
+                _stage_rows(
+                    conn,
+                    "#payments_stage",
+                    (
+                        "payment_id", "order_id", "user_id", "status", "amount", "currency",
+                        "provider", "occurred_at", "correlation_id", "source_service",
+                    ),
+                    payments,
+                )
+                res = conn.execute(
+                    text(
+                        """
+                        ;WITH latest AS (
+                            SELECT
+                                *,
+                                ROW_NUMBER() OVER (PARTITION BY payment_id ORDER BY occurred_at DESC) AS rn
+                            FROM #payments_stage
                         )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
+                        MERGE silver.payments AS tgt
+                        USING (SELECT * FROM latest WHERE rn = 1) AS src
+                        ON tgt.payment_id = src.payment_id
+                        -- T-SQL allows only one WHEN MATCHED ... UPDATE, so stale and no-op
+                        -- matches are filtered here instead of being rewritten with their own values.
+                        WHEN MATCHED AND (
+                            tgt.occurred_at < src.occurred_at
+                            OR EXISTS (
+                                SELECT
+                                    COALESCE(src.order_id, tgt.order_id),
+                                    COALESCE(src.user_id, tgt.user_id),
+                                    COALESCE(src.correlation_id, tgt.correlation_id),
+                                    COALESCE(src.source_service, tgt.source_service)
+                                EXCEPT
+                                SELECT tgt.order_id, tgt.user_id, tgt.correlation_id, tgt.source_service
+                            )
+                            OR (
+                                tgt.occurred_at = src.occurred_at
+                                AND EXISTS (
+                                    SELECT
+                                        src.status,
+                                        COALESCE(src.amount, tgt.amount),
+                                        COALESCE(src.currency, tgt.currency),
+                                        COALESCE(src.provider, tgt.provider)
+                                    EXCEPT
+                                    SELECT tgt.status, tgt.amount, tgt.currency, tgt.provider
+                                )
+                            )
+                        ) THEN
+                            UPDATE SET
+                                tgt.order_id = COALESCE(src.order_id, tgt.order_id),
+                                tgt.user_id = COALESCE(src.user_id, tgt.user_id),
+                                tgt.status = CASE WHEN tgt.occurred_at <= src.occurred_at THEN src.status ELSE tgt.status END,
+                                tgt.amount = CASE WHEN tgt.occurred_at <= src.occurred_at THEN COALESCE(src.amount, tgt.amount) ELSE tgt.amount END,
+                                tgt.currency = CASE WHEN tgt.occurred_at <= src.occurred_at THEN COALESCE(src.currency, tgt.currency) ELSE tgt.currency END,
+                                tgt.provider = CASE WHEN tgt.occurred_at <= src.occurred_at THEN COALESCE(src.provider, tgt.provider) ELSE tgt.provider END,
+                                tgt.occurred_at = CASE WHEN tgt.occurred_at >= src.occurred_at THEN tgt.occurred_at ELSE src.occurred_at END,
+                                tgt.correlation_id = COALESCE(src.correlation_id, tgt.correlation_id),
+                                tgt.source_service = COALESCE(src.source_service, tgt.source_service)
+                        WHEN NOT MATCHED THEN
+                            INSERT (payment_id, order_id, user_id, status, amount, currency, provider, occurred_at, correlation_id, source_service)
+                            VALUES (src.payment_id, src.order_id, src.user_id, src.status, src.amount, src.currency, src.provider, src.occurred_at, src.correlation_id, src.source_service);
+
+                        DROP TABLE #payments_stage;
+                        """
+                    )
+                )
+                rows_inserted += int(getattr(res, "rowcount", 0) or 0)
 
-            # Upsert reviews
             if reviews:
-                for i in range(0, len(reviews), 500):
-                    batch = reviews[i : i + 500]
-                    ids = [str(x["review_id"]) for x in batch]
-                    existing = _existing_ids(conn, "silver.reviews", "review_id", ids)
-
-                    inserts = [x for x in batch if str(x["review_id"]) not in existing]
-                    updates = [x for x in batch if str(x["review_id"]) in existing]
-
-                    if inserts:
-                        res = conn.execute(
-                            text(
-                                """
-                                INSERT INTO silver.reviews
-                                    (review_id, product_id, user_id, rating, comment, created_at, correlation_id)
-                                VALUES
-                                    (:review_id, :product_id, :user_id, :rating, :comment, :created_at, :correlation_id);
-                                """
-                            ),
-                            inserts,
-                        )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
-
-                    if updates:
-                        res = conn.execute(
-                            text(
-                                """
-                                UPDATE silver.reviews
-                                SET
-                                    product_id = COALESCE(:product_id, product_id),
-                                    user_id = COALESCE(:user_id, user_id),
-                                    rating = CASE WHEN created_at <= :created_at THEN :rating ELSE rating END,
-                                    comment = CASE WHEN created_at <= :created_at THEN COALESCE(:comment, comment) ELSE comment END,
-                                    created_at = CASE WHEN created_at <= :created_at THEN created_at ELSE :created_at END,
-                                    correlation_id = COALESCE(:correlation_id, correlation_id)
-                                WHERE review_id = :review_id;
-                                """
-                            ),
-                            updates,
+                conn.execute(
+                    text(
+                        """
+                        IF OBJECT_ID('tempdb..#reviews_stage') IS NOT NULL DROP TABLE #reviews_stage;
+                        CREATE TABLE #reviews_stage(
+                            review_id varchar(64) NOT NULL,
+                            product_id varchar(64) NOT NULL,
+                            user_id varchar(64) NULL,
+                            rating int NOT NULL,
+                            comment nvarchar(1000) NULL,
+                            created_at datetime2 NOT NULL,
+                            correlation_id varchar(64) NULL
+                        );
+                        """
+                    )
+                )
+                _stage_rows(
+                    conn,
+                    "#reviews_stage",
+                    ("review_id", "product_id", "user_id", "rating", "comment", "created_at", "correlation_id"),
+                    reviews,
+                )
+                res = conn.execute(
+                    text(
+                        """
+                        ;WITH latest AS (
+                            SELECT
+                                review_id,
+                                product_id,
+                                user_id,
+                                rating,
+                                comment,
+                                created_at,
+                                MIN(created_at) OVER (PARTITION BY review_id) AS first_created_at,
+                                correlation_id,
+                                ROW_NUMBER() OVER (PARTITION BY review_id ORDER BY created_at DESC) AS rn
+                            FROM #reviews_stage
                         )
-                        rows_inserted += int(getattr(res, "rowcount", 0) or 0)
+                        MERGE silver.reviews AS tgt
+                        USING (SELECT * FROM latest WHERE rn = 1) AS src
+                        ON tgt.review_id = src.review_id
+                        WHEN MATCHED AND (
+                            src.first_created_at < tgt.created_at
+                            OR EXISTS (
+                                SELECT
+                                    COALESCE(src.product_id, tgt.product_id),
+                                    COALESCE(src.user_id, tgt.user_id),
+                                    COALESCE(src.correlation_id, tgt.correlation_id)
+                                EXCEPT
+                                SELECT tgt.product_id, tgt.user_id, tgt.correlation_id
+                            )
+                            OR (
+                                tgt.created_at <= src.created_at
+                                AND EXISTS (
+                                    SELECT src.rating, COALESCE(src.comment, tgt.comment)
+                                    EXCEPT
+                                    SELECT tgt.rating, tgt.comment
+                                )
+                            )
+                        ) THEN
+                            UPDATE SET
+                                tgt.product_id = COALESCE(src.product_id, tgt.product_id),
+                                tgt.user_id = COALESCE(src.user_id, tgt.user_id),
+                                tgt.rating = CASE WHEN tgt.created_at <= src.created_at THEN src.rating ELSE tgt.rating END,
+                                tgt.comment = CASE WHEN tgt.created_at <= src.created_at THEN COALESCE(src.comment, tgt.comment) ELSE tgt.comment END,
+                                tgt.created_at = CASE WHEN tgt.created_at <= src.first_created_at THEN tgt.created_at ELSE src.first_created_at END,
+                                tgt.correlation_id = COALESCE(src.correlation_id, tgt.correlation_id)
+                        WHEN NOT MATCHED THEN
+                            INSERT (review_id, product_id, user_id, rating, comment, created_at, correlation_id)
+                            VALUES (src.review_id, src.product_id, src.user_id, src.rating, src.comment, src.first_created_at, src.correlation_id);
+
+                        DROP TABLE #reviews_stage;
+                        """
+                    )
+                )
+                rows_inserted += int(getattr(res, "rowcount", 0) or 0)
 
             # Purchases -> product_interactions (after orders + order_items are refreshed)
             res = conn.execute(
@@ -1471,7 +2186,7 @@ def main() -> int:
                     """
                     INSERT INTO silver.product_interactions
                         (event_timestamp, session_id, user_id, product_id, interaction_type, properties)
-                    SELECT DISTINCT
+                    SELECT
                         o.updated_at AS event_timestamp,
                         COALESCE(o.correlation_id, o.order_id) AS session_id,
                         o.user_id,
@@ -1479,13 +2194,19 @@ def main() -> int:
                         'purchase' AS interaction_type,
                         CONCAT(
                             '{',
-                                '\"order_id\":\"', REPLACE(COALESCE(o.order_id, ''), '\"', ''), '\",',
+                                '\"order_id\":\"', STRING_ESCAPE(COALESCE(o.order_id, ''), 'json'), '\",',
                                 '\"source\":\"silver.orders\",',
-                                '\"status\":\"', REPLACE(COALESCE(o.status, ''), '\"', ''), '\"',
+                                '\"status\":\"', STRING_ESCAPE(COALESCE(o.status, ''), 'json'), '\"',
                             '}'
                         ) AS properties
                     FROM silver.orders o
-                    INNER JOIN silver.order_items oi ON o.order_id = oi.order_id
+                    -- Every other column comes from the order, so de-duplicating products
+                    -- per order is equivalent to DISTINCT over the whole (wide) row.
+                    CROSS APPLY (
+                        SELECT DISTINCT oi.product_id
+                        FROM silver.order_items oi
+                        WHERE oi.order_id = o.order_id
+                    ) oi
                     WHERE o.status = 'paid'
                       AND o.updated_at >= :since;
                     """
@@ -1494,8 +2215,13 @@ def main() -> int:
             )
             rows_inserted += int(getattr(res, "rowcount", 0) or 0)
 
-            purchase_rows_inserted = build_silver_purchases(conn)
-            session_rows_inserted = build_silver_session_facts(conn, days=args.days)
+            purchase_rows_inserted = build_silver_purchases(conn, full_refresh=args.full_refresh)
+            session_rows_inserted = build_silver_session_facts(
+                conn,
+                days=args.days,
+                inputs_changed=bool(args.full_refresh or web_rows_inserted or purchase_rows_inserted),
+                full_refresh=args.full_refresh,
+            )
 
             finish_run(
                 conn,
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import os
+import threading
 from datetime import timedelta
 
 from sqlalchemy import text
 
 from src.config import load_settings
 from src.db.engine import get_engine
+from src.etl._derived_schema import ensure_derived_schema
 from src.etl._ops import fail_run, finish_run, start_run
 from src.utils.time import utc_now
 
+# The pipeline runner calls main() in-process on every tick, so once the gold
+# tables have been verified (and committed) there is no need to re-check them.
+_SCHEMA_VERIFIED: set[str] = set()
+_SCHEMA_LOCK = threading.Lock()
+
 
 def _exec(conn, sql: str) -> None:
     conn.execute(text(sql))
@@ -97,13 +104,133 @@ def _ensure_conversion_funnel_schema(conn) -> None:
     )
 
 
-def _safe_rowcount(result) -> int:
-    rc = getattr(result, "rowcount", 0)
-    try:
-        n = int(rc or 0)
-    except Exception:
-        n = 0
-    return n if n > 0 else 0
+def _seed_filter(show_seed_data: bool, column: str = "is_seed") -> str:
+    # Inlined rather than bound: with a literal predicate each setting gets its own
+    # cached plan, and the common (seed hidden) one can seek on is_seed directly.
+    return "1 = 1" if show_seed_data else f"{column} = 0"
+
+
+def _materialize_session_scope(conn, since_date, *, show_seed_data: bool) -> None:
+    # The recent, seed-filtered slice of silver.session_events, read once and shared
+    # by the behavior_daily and funnel_daily rebuilds.
+    conn.execute(
+        text(
+            """
+            IF OBJECT_ID('tempdb..#session_scope') IS NOT NULL DROP TABLE #session_scope;
+            CREATE TABLE #session_scope(
+                metric_date date NOT NULL,
+                session_id nvarchar(64) NOT NULL,
+                user_id nvarchar(64) NULL,
+                event_type nvarchar(64) NOT NULL
+            );
+            CREATE CLUSTERED INDEX CX_session_scope ON #session_scope (metric_date, session_id);
+            """
+        )
+    )
+    conn.execute(
+        text(
+            f"""
+            INSERT INTO #session_scope (metric_date, session_id, user_id, event_type)
+            SELECT CAST(event_timestamp AS date), session_id, user_id, event_type
+            FROM silver.session_events
+            WHERE event_timestamp >= :since_date
+              AND {_seed_filter(show_seed_data)};
+            """
+        ),
+        {"since_date": since_date},
+    )
+
+
+def _merge_since(
+    conn,
+    table: str,
+    keys: tuple[str, ...],
+    values: tuple[str, ...],
+    source_sql: str,
+    source: str,
+    params: dict[str, object],
+) -> int:
+    # Reconciles the recent window in place: unchanged rows are left alone, so only
+    # real changes are logged and readers never see the window empty.
+    cols = (*keys, *values)
+    res = conn.execute(
+        text(
+            f"""
+            {source_sql},
+            tgt AS (
+                SELECT * FROM {table} WHERE metric_date >= :since_date
+            )
+            MERGE tgt
+            USING (
+                SELECT {", ".join(cols)} FROM {source} WHERE metric_date >= :since_date
+            ) AS src
+            ON {" AND ".join(f"tgt.{c} = src.{c}" for c in keys)}
+            WHEN MATCHED AND EXISTS (
+                SELECT {", ".join(f"src.{c}" for c in values)}
+                EXCEPT
+                SELECT {", ".join(f"tgt.{c}" for c in values)}
+            ) THEN
+                UPDATE SET {", ".join(f"tgt.{c} = src.{c}" for c in values)}
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT ({", ".join(cols)})
+                VALUES ({", ".join(f"src.{c}" for c in cols)})
+            WHEN NOT MATCHED BY SOURCE THEN
+                DELETE;
+            """
+        ),
+        params,
+    )
+    return int(getattr(res, "rowcount", 0) or 0)
+
+
+def _distinct_count_sql(expr: str, *, approx: bool) -> str:
+    # APPROX_COUNT_DISTINCT (SQL Server 2019+) keeps a fixed-size sketch per group
+    # instead of hashing every distinct value; error is typically within ~2%.
+    return f"APPROX_COUNT_DISTINCT({expr})" if approx else f"COUNT(DISTINCT {expr})"
+
+
+def _latency_stats_sql(*, approx: bool) -> str:
+    # PERCENTILE_CONT is only a window function here, so the exact path sorts every
+    # partition and dedupes the per-row copies; APPROX_PERCENTILE_CONT (SQL Server
+    # 2022+) is a plain aggregate and groups in one pass with bounded memory.
+    if approx:
+        return """
+                agg AS (
+                    SELECT
+                        metric_date,
+                        service,
+                        CAST(APPROX_PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY response_time_ms) AS int) AS p50_latency_ms,
+                        CAST(APPROX_PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY response_time_ms) AS int) AS p95_latency_ms,
+                        CAST(SUM(CASE WHEN status_code >= 500 THEN 1 ELSE 0 END) AS decimal(10,4))
+                            / NULLIF(CAST(COUNT(*) AS decimal(10,4)), 0) AS error_rate
+                    FROM base
+                    GROUP BY metric_date, service
+                ),"""
+    return """
+                w AS (
+                    SELECT
+                        metric_date,
+                        service,
+                        CAST(
+                            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY response_time_ms)
+                            OVER (PARTITION BY metric_date, service) AS int
+                        ) AS p50_latency_ms,
+                        CAST(
+                            PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY response_time_ms)
+                            OVER (PARTITION BY metric_date, service) AS int
+                        ) AS p95_latency_ms,
+                        CAST(
+                            SUM(CASE WHEN status_code >= 500 THEN 1 ELSE 0 END)
+                            OVER (PARTITION BY metric_date, service) AS decimal(10,4)
+                        ) / NULLIF(
+                            CAST(COUNT(*) OVER (PARTITION BY metric_date, service) AS decimal(10,4)), 0
+                        ) AS error_rate
+                    FROM base
+                ),
+                agg AS (
+                    SELECT DISTINCT metric_date, service, p50_latency_ms, p95_latency_ms, error_rate
+                    FROM w
+                ),"""
 
 
 def _env_int(name: str, default: int, *, min_value: int = 1, max_value: int = 365) -> int:
@@ -115,10 +242,48 @@ def _env_int(name: str, default: int, *, min_value: int = 1, max_value: int = 36
     return max(min_value, min(max_value, value))
 
 
+def _materialize_seed_orders(conn, since_date, *, show_seed_data: bool) -> None:
+    # Created in its own (unparameterized) batch so it outlives the statement and
+    # every gold build on this connection can probe it by primary key. It stays
+    # empty when seed data is shown, so probes need no show_seed_data escape hatch.
+    conn.execute(
+        text(
+            """
+            IF OBJECT_ID('tempdb..#seed_orders') IS NOT NULL DROP TABLE #seed_orders;
+            CREATE TABLE #seed_orders(order_id nvarchar(64) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);
+            """
+        )
+    )
+    if show_seed_data:
+        return
+    conn.execute(
+        text(
+            """
+            INSERT INTO #seed_orders (order_id)
+            SELECT DISTINCT be.extracted_order_id
+            FROM bronze.business_events be
+            WHERE be.event_timestamp >= :since_date
+              AND be.is_seed = 1
+              AND be.extracted_order_id IS NOT NULL;
+            """
+        ),
+        {"since_date": since_date},
+    )
+
+
 def main() -> int:
     settings = load_settings()
     engine = get_engine(settings)
     show_seed_data = bool(getattr(settings, "show_seed_data", False))
+    approx = bool(getattr(settings, "gold_approx_distinct", False))
+    approx_percentiles = bool(getattr(settings, "gold_approx_percentiles", False))
+    seed_filter = _seed_filter(show_seed_data)
+    pv_seed_filter = _seed_filter(show_seed_data, "pv.is_seed")
+    seq_seed_filter = (
+        "1 = 1"
+        if show_seed_data
+        else "NOT EXISTS (SELECT 1 FROM seed_sessions ss WHERE ss.session_id = ps.session_id)"
+    )
 
     with engine.begin() as conn:
         run = start_run(conn, "build_gold")
@@ -127,83 +292,80 @@ def main() -> int:
             since_date = (utc_now() - timedelta(days=recent_days)).date()
             rows_inserted = 0
 
-            _ensure_behavior_gold_tables(conn)
-            _ensure_conversion_funnel_schema(conn)
+            with _SCHEMA_LOCK:
+                schema_verified = "gold" in _SCHEMA_VERIFIED
+            if not schema_verified:
+                ensure_derived_schema(conn)
+                _ensure_behavior_gold_tables(conn)
+                _ensure_conversion_funnel_schema(conn)
+            # Seed orders are scanned out of bronze once; the realtime snapshot looks
+            # back 7 days, so the window never shrinks below that.
+            _materialize_seed_orders(
+                conn,
+                min(since_date, (utc_now() - timedelta(days=7)).date()),
+                show_seed_data=show_seed_data,
+            )
 
             _exec_params(
                 conn,
-                """
-                ;WITH seed_orders AS (
-                    SELECT DISTINCT
-                        COALESCE(
-                            be.entity_id,
-                            JSON_VALUE(be.payload, '$.order_id'),
-                            JSON_VALUE(be.payload, '$.data.order_id'),
-                            JSON_VALUE(be.payload, '$.order.order_id')
-                        ) AS order_id
-                    FROM bronze.business_events be
-                    WHERE be.event_timestamp >= :since_date
-                      AND be.payload LIKE '%seed_run_id%'
-                ),
-                pv AS (
+                f"""
+                ;WITH pv AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS funnel_date,
+                        event_date AS funnel_date,
                         session_id,
                         page_url
                     FROM bronze.page_view_events
                     WHERE event_timestamp >= :since_date
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
+                      AND event_date >= :since_date
+                      AND {seed_filter}
                 ),
                 checkout_events AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS funnel_date,
+                        event_date AS funnel_date,
                         session_id
                     FROM bronze.page_view_events
                     WHERE event_timestamp >= :since_date
+                      AND event_date >= :since_date
                       AND page_url = '/checkout'
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
+                      AND {seed_filter}
 
                     UNION
 
                     SELECT
-                        CAST(event_timestamp AS date) AS funnel_date,
+                        event_date AS funnel_date,
                         session_id
                     FROM bronze.click_events
                     WHERE event_timestamp >= :since_date
+                      AND event_date >= :since_date
                       AND element_id = 'btn_checkout'
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
+                      AND {seed_filter}
                 ),
-                steps AS (
-                    SELECT
-                        funnel_date,
-                        'visit_home' AS funnel_step,
-                        1 AS step_order,
-                        COUNT(DISTINCT session_id) AS users_count
-                    FROM pv
-                    WHERE page_url = '/'
-                    GROUP BY funnel_date
-
-                    UNION ALL
-
+                pv_steps AS (
                     SELECT
                         funnel_date,
-                        'visit_products' AS funnel_step,
-                        2 AS step_order,
-                        COUNT(DISTINCT session_id) AS users_count
+                        {_distinct_count_sql("CASE WHEN page_url = '/' THEN session_id END", approx=approx)} AS visit_home,
+                        {_distinct_count_sql("CASE WHEN page_url = '/products' THEN session_id END", approx=approx)} AS visit_products,
+                        {_distinct_count_sql("CASE WHEN page_url LIKE '/products/%' THEN session_id END", approx=approx)} AS product_view
                     FROM pv
-                    WHERE page_url = '/products'
+                    WHERE page_url = '/' OR page_url LIKE '/products%'
                     GROUP BY funnel_date
-
-                    UNION ALL
-
+                ),
+                steps AS (
+                    -- One pass over page views for the first three steps; days without
+                    -- sessions for a step still produce no row for it.
                     SELECT
-                        funnel_date,
-                        'product_view' AS funnel_step,
-                        3 AS step_order,
-                        COUNT(DISTINCT session_id) AS users_count
-                    FROM pv
-                    WHERE page_url LIKE '/products/%'
-                    GROUP BY funnel_date
+                        ps.funnel_date,
+                        v.funnel_step,
+                        v.step_order,
+                        v.users_count
+                    FROM pv_steps ps
+                    CROSS APPLY (
+                        VALUES
+                            ('visit_home', 1, ps.visit_home),
+                            ('visit_products', 2, ps.visit_products),
+                            ('product_view', 3, ps.product_view)
+                    ) v(funnel_step, step_order, users_count)
+                    WHERE v.users_count > 0
 
                     UNION ALL
 
@@ -211,11 +373,11 @@ def main() -> int:
                         CAST(event_timestamp AS date) AS funnel_date,
                         'add_to_cart' AS funnel_step,
                         4 AS step_order,
-                        COUNT(DISTINCT session_id) AS users_count
+                        {_distinct_count_sql("session_id", approx=approx)} AS users_count
                     FROM silver.product_interactions
                     WHERE interaction_type = 'add_to_cart'
                       AND event_timestamp >= :since_date
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
+                      AND {seed_filter}
                     GROUP BY CAST(event_timestamp AS date)
 
                     UNION ALL
@@ -224,7 +386,7 @@ def main() -> int:
                         funnel_date,
                         'checkout_started' AS funnel_step,
                         5 AS step_order,
-                        COUNT(DISTINCT session_id) AS users_count
+                        {_distinct_count_sql("session_id", approx=approx)} AS users_count
                     FROM checkout_events
                     GROUP BY funnel_date
 
@@ -234,11 +396,11 @@ def main() -> int:
                         CAST(updated_at AS date) AS funnel_date,
                         'purchase' AS funnel_step,
                         6 AS step_order,
-                        COUNT(DISTINCT COALESCE(correlation_id, order_id)) AS users_count
+                        {_distinct_count_sql("COALESCE(correlation_id, order_id)", approx=approx)} AS users_count
                     FROM silver.orders o
                     WHERE o.status = 'paid'
                       AND o.updated_at >= :since_date
-                      AND (:show_seed_data = 1 OR NOT EXISTS (SELECT 1 FROM seed_orders so WHERE so.order_id = o.order_id))
+                      AND NOT EXISTS (SELECT 1 FROM #seed_orders so WHERE so.order_id = o.order_id)
                     GROUP BY CAST(updated_at AS date)
                 ),
                 with_prev AS (
@@ -256,15 +418,14 @@ def main() -> int:
                         funnel_step,
                         step_order,
                         users_count,
-                        CASE
-                            WHEN prev_users_count IS NULL THEN NULL
-                            WHEN prev_users_count = 0 THEN NULL
-                            WHEN d.raw_drop_off_rate < 0 THEN CAST(0 AS decimal(9,6))
-                            WHEN d.raw_drop_off_rate > 1 THEN CAST(1 AS decimal(9,6))
-                            ELSE CAST(d.raw_drop_off_rate AS decimal(9,6))
-                        END AS drop_off_rate
+                        -- NULL when there is no previous step (NULLIF covers a zero count).
+                        -- Counts are never negative, so the rate can only fall below 0.
+                        CAST(
+                            CASE WHEN d.raw_drop_off_rate < 0 THEN 0 ELSE d.raw_drop_off_rate END
+                            AS decimal(9,6)
+                        ) AS drop_off_rate
                     FROM with_prev
-                    OUTER APPLY (
+                    CROSS APPLY (
                         SELECT CAST(
                             (CAST(prev_users_count AS decimal(18,6)) - CAST(users_count AS decimal(18,6)))
                             / NULLIF(CAST(prev_users_count AS decimal(18,6)), 0)
@@ -284,76 +445,62 @@ def main() -> int:
                     INSERT (funnel_date, funnel_step, step_order, users_count, drop_off_rate)
                     VALUES (src.funnel_date, src.funnel_step, src.step_order, src.users_count, src.drop_off_rate);
                 """,
-                {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.behavior_daily WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
+            _materialize_session_scope(conn, since_date, show_seed_data=show_seed_data)
+            rows_inserted += _merge_since(
+                conn,
+                "gold.behavior_daily",
+                ("metric_date",),
+                ("sessions", "unique_users", "page_views", "clicks", "add_to_cart", "begin_checkout", "purchases"),
+                f"""
                         ;WITH se AS (
                             SELECT
-                                CAST(event_timestamp AS date) AS metric_date,
-                                COUNT(DISTINCT session_id) AS sessions,
-                                COUNT(DISTINCT CASE WHEN user_id IS NULL THEN NULL ELSE user_id END) AS unique_users,
+                                metric_date,
+                                {_distinct_count_sql("session_id", approx=approx)} AS sessions,
+                                {_distinct_count_sql("user_id", approx=approx)} AS unique_users,
                                 SUM(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END) AS page_views,
                                 SUM(CASE WHEN event_type = 'click' THEN 1 ELSE 0 END) AS clicks,
                                 SUM(CASE WHEN event_type = 'add_to_cart' THEN 1 ELSE 0 END) AS add_to_cart,
                                 SUM(CASE WHEN event_type = 'begin_checkout' THEN 1 ELSE 0 END) AS begin_checkout,
                                 SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) AS purchases
-                            FROM silver.session_events
-                            WHERE event_timestamp >= :since_date
-                              AND (:show_seed_data = 1 OR COALESCE(properties_json, '') NOT LIKE '%seed_run_id%')
-                            GROUP BY CAST(event_timestamp AS date)
-                        )
-                        INSERT INTO gold.behavior_daily
-                            (metric_date, sessions, unique_users, page_views, clicks, add_to_cart, begin_checkout, purchases)
-                        SELECT
-                            metric_date, sessions, unique_users, page_views, clicks, add_to_cart, begin_checkout, purchases
-                        FROM se
-                        WHERE metric_date >= :since_date;
-                        """
-                    ),
-                    {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
-                )
+                            FROM #session_scope
+                            GROUP BY metric_date
+                        )""",
+                "se",
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.funnel_daily WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
+            rows_inserted += _merge_since(
+                conn,
+                "gold.funnel_daily",
+                ("metric_date",),
+                (
+                    "view_sessions", "cart_sessions", "checkout_sessions", "purchase_sessions",
+                    "view_to_cart_rate", "cart_to_checkout_rate", "checkout_to_purchase_rate", "view_to_purchase_rate",
+                ),
+                """
                         ;WITH session_flags AS (
                             SELECT
-                                CAST(event_timestamp AS date) AS metric_date,
+                                metric_date,
                                 session_id,
                                 MAX(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END) AS has_view,
                                 MAX(CASE WHEN event_type = 'add_to_cart' THEN 1 ELSE 0 END) AS has_cart,
                                 MAX(CASE WHEN event_type = 'begin_checkout' THEN 1 ELSE 0 END) AS has_checkout,
                                 MAX(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) AS has_purchase
-                            FROM silver.session_events
-                            WHERE event_timestamp >= :since_date
-                              AND (:show_seed_data = 1 OR COALESCE(properties_json, '') NOT LIKE '%seed_run_id%')
-                            GROUP BY CAST(event_timestamp AS date), session_id
+                            FROM #session_scope
+                            GROUP BY metric_date, session_id
                         ),
                         session_counts AS (
                             SELECT
                                 metric_date,
-                                COUNT(DISTINCT CASE WHEN has_view = 1 THEN session_id END) AS view_sessions,
-                                COUNT(DISTINCT CASE WHEN has_cart = 1 THEN session_id END) AS cart_sessions,
-                                COUNT(DISTINCT CASE WHEN has_checkout = 1 THEN session_id END) AS checkout_sessions,
-                                COUNT(DISTINCT CASE WHEN has_purchase = 1 THEN session_id END) AS purchase_sessions
+                                -- session_flags holds one row per (metric_date, session_id),
+                                -- so the flag sums are exact distinct-session counts.
+                                SUM(has_view) AS view_sessions,
+                                SUM(has_cart) AS cart_sessions,
+                                SUM(has_checkout) AS checkout_sessions,
+                                SUM(has_purchase) AS purchase_sessions
                             FROM session_flags
                             GROUP BY metric_date
                         ),
@@ -369,53 +516,27 @@ def main() -> int:
                                 CASE WHEN checkout_sessions = 0 THEN 0.0 ELSE CAST(purchase_sessions AS float) / CAST(checkout_sessions AS float) END AS checkout_to_purchase_rate,
                                 CASE WHEN view_sessions = 0 THEN 0.0 ELSE CAST(purchase_sessions AS float) / CAST(view_sessions AS float) END AS view_to_purchase_rate
                             FROM session_counts
-                        )
-                        INSERT INTO gold.funnel_daily
-                            (metric_date, view_sessions, cart_sessions, checkout_sessions, purchase_sessions,
-                             view_to_cart_rate, cart_to_checkout_rate, checkout_to_purchase_rate, view_to_purchase_rate)
-                        SELECT
-                            metric_date, view_sessions, cart_sessions, checkout_sessions, purchase_sessions,
-                            view_to_cart_rate, cart_to_checkout_rate, checkout_to_purchase_rate, view_to_purchase_rate
-                        FROM with_rates
-                        WHERE metric_date >= :since_date;
-                        """
-                    ),
-                    {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
-                )
+                        )""",
+                "with_rates",
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.product_daily WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
-                        ;WITH seed_orders AS (
-                            SELECT DISTINCT
-                                COALESCE(
-                                    be.entity_id,
-                                    JSON_VALUE(be.payload, '$.order_id'),
-                                    JSON_VALUE(be.payload, '$.data.order_id'),
-                                    JSON_VALUE(be.payload, '$.order.order_id')
-                                ) AS order_id
-                            FROM bronze.business_events be
-                            WHERE be.event_timestamp >= :since_date
-                              AND be.payload LIKE '%seed_run_id%'
-                        ),
-                        paid AS (
+            rows_inserted += _merge_since(
+                conn,
+                "gold.product_daily",
+                ("product_id", "metric_date"),
+                ("purchases_count", "revenue", "avg_rating", "reviews_count"),
+                """
+                        ;WITH paid AS (
                             SELECT
                                 o.order_id,
                                 o.updated_at
                             FROM silver.orders o
                             WHERE o.updated_at >= :since_date
                               AND o.status = 'paid'
-                              AND (:show_seed_data = 1 OR NOT EXISTS (
-                                  SELECT 1 FROM seed_orders so WHERE so.order_id = o.order_id
-                              ))
+                              AND NOT EXISTS (
+                                  SELECT 1 FROM #seed_orders so WHERE so.order_id = o.order_id
+                              )
                         ),
                         item_sales AS (
                             SELECT
@@ -465,27 +586,20 @@ def main() -> int:
                             LEFT JOIN reviews r
                                 ON k.metric_date = r.metric_date AND k.product_id = r.product_id
                             WHERE k.product_id IS NOT NULL AND LTRIM(RTRIM(k.product_id)) <> ''
-                        )
-                        INSERT INTO gold.product_daily (product_id, metric_date, purchases_count, revenue, avg_rating, reviews_count)
-                        SELECT product_id, metric_date, purchases_count, revenue, avg_rating, reviews_count
-                        FROM merged
-                        WHERE metric_date >= :since_date;
-                        """
-                    ),
-                    {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
-                )
+                        )""",
+                "merged",
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.product_metrics WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
+            rows_inserted += _merge_since(
+                conn,
+                "gold.product_metrics",
+                ("product_id", "metric_date"),
+                (
+                    "views_count", "clicks_count", "add_to_cart_count", "purchases_count", "revenue",
+                    "avg_rating", "reviews_count", "view_to_cart_rate", "cart_to_purchase_rate",
+                ),
+                f"""
                 ;WITH interactions AS (
                     SELECT
                         CAST(event_timestamp AS date) AS metric_date,
@@ -495,21 +609,9 @@ def main() -> int:
                         SUM(CASE WHEN interaction_type = 'add_to_cart' THEN 1 ELSE 0 END) AS add_to_cart_count
                     FROM silver.product_interactions
                     WHERE event_timestamp >= :since_date
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
+                      AND {seed_filter}
                     GROUP BY CAST(event_timestamp AS date), product_id
                 ),
-                seed_orders AS (
-                    SELECT DISTINCT
-                        COALESCE(
-                            be.entity_id,
-                            JSON_VALUE(be.payload, '$.order_id'),
-                            JSON_VALUE(be.payload, '$.data.order_id'),
-                            JSON_VALUE(be.payload, '$.order.order_id')
-                        ) AS order_id
-                    FROM bronze.business_events be
-                    WHERE be.event_timestamp >= :since_date
-                      AND be.payload LIKE '%seed_run_id%'
-                ),
                 purchases AS (
                     SELECT
                         CAST(o.updated_at AS date) AS metric_date,
@@ -519,7 +621,7 @@ def main() -> int:
                     FROM silver.order_items oi
                     INNER JOIN silver.orders o ON oi.order_id = o.order_id
                     WHERE o.status = 'paid' AND o.updated_at >= :since_date
-                      AND (:show_seed_data = 1 OR NOT EXISTS (SELECT 1 FROM seed_orders so WHERE so.order_id = o.order_id))
+                      AND NOT EXISTS (SELECT 1 FROM #seed_orders so WHERE so.order_id = o.order_id)
                     GROUP BY CAST(o.updated_at AS date), oi.product_id
                 ),
                 reviews AS (
@@ -532,17 +634,10 @@ def main() -> int:
                     WHERE created_at >= :since_date
                     GROUP BY CAST(created_at AS date), product_id
                 ),
-                keys AS (
-                    SELECT metric_date, product_id FROM interactions
-                    UNION
-                    SELECT metric_date, product_id FROM purchases
-                    UNION
-                    SELECT metric_date, product_id FROM reviews
-                ),
                 merged AS (
                     SELECT
-                        k.metric_date,
-                        k.product_id,
+                        COALESCE(i.metric_date, p.metric_date, r.metric_date) AS metric_date,
+                        COALESCE(i.product_id, p.product_id, r.product_id) AS product_id,
                         ISNULL(i.views_count, 0) AS views_count,
                         ISNULL(i.clicks_count, 0) AS clicks_count,
                         ISNULL(i.add_to_cart_count, 0) AS add_to_cart_count,
@@ -550,78 +645,39 @@ def main() -> int:
                         ISNULL(p.revenue, 0) AS revenue,
                         r.avg_rating,
                         ISNULL(r.reviews_count, 0) AS reviews_count,
-                        CASE
-                            WHEN ISNULL(i.views_count, 0) = 0 THEN NULL
-                            ELSE
-                                CASE
-                                    WHEN (
-                                        CAST(ISNULL(i.add_to_cart_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.views_count AS decimal(18,6)), 0)
-                                    ) < 0 THEN CAST(0 AS decimal(9,6))
-                                    WHEN (
-                                        CAST(ISNULL(i.add_to_cart_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.views_count AS decimal(18,6)), 0)
-                                    ) > 1 THEN CAST(1 AS decimal(9,6))
-                                    ELSE CAST(
-                                        CAST(ISNULL(i.add_to_cart_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.views_count AS decimal(18,6)), 0)
-                                        AS decimal(9,6)
-                                    )
-                                END
-                        END AS view_to_cart_rate,
-                        CASE
-                            WHEN ISNULL(i.add_to_cart_count, 0) = 0 THEN NULL
-                            ELSE
-                                CASE
-                                    WHEN (
-                                        CAST(ISNULL(p.purchases_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.add_to_cart_count AS decimal(18,6)), 0)
-                                    ) < 0 THEN CAST(0 AS decimal(9,6))
-                                    WHEN (
-                                        CAST(ISNULL(p.purchases_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.add_to_cart_count AS decimal(18,6)), 0)
-                                    ) > 1 THEN CAST(1 AS decimal(9,6))
-                                    ELSE CAST(
-                                        CAST(ISNULL(p.purchases_count, 0) AS decimal(18,6))
-                                        / NULLIF(CAST(i.add_to_cart_count AS decimal(18,6)), 0)
-                                        AS decimal(9,6)
-                                    )
-                                END
-                        END AS cart_to_purchase_rate
-                    FROM keys k
-                    LEFT JOIN interactions i
-                        ON k.metric_date = i.metric_date AND k.product_id = i.product_id
-                    LEFT JOIN purchases p
-                        ON k.metric_date = p.metric_date AND k.product_id = p.product_id
-                    LEFT JOIN reviews r
-                        ON k.metric_date = r.metric_date AND k.product_id = r.product_id
-                    WHERE k.product_id IS NOT NULL
-                )
-                INSERT INTO gold.product_metrics (
-                    product_id, metric_date, views_count, clicks_count, add_to_cart_count,
-                    purchases_count, revenue, avg_rating, reviews_count, view_to_cart_rate, cart_to_purchase_rate
-                )
-                SELECT
-                    product_id, metric_date, views_count, clicks_count, add_to_cart_count,
-                    purchases_count, revenue, avg_rating, reviews_count, view_to_cart_rate, cart_to_purchase_rate
-                FROM merged
-                WHERE metric_date >= :since_date;
-                            """
-                    ),
-                    {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
-                )
+                        -- Both ratios are non-negative; only the upper bound needs clamping.
+                        CAST(
+                            CASE WHEN x.view_to_cart > 1 THEN 1 ELSE x.view_to_cart END AS decimal(9,6)
+                        ) AS view_to_cart_rate,
+                        CAST(
+                            CASE WHEN x.cart_to_purchase > 1 THEN 1 ELSE x.cart_to_purchase END AS decimal(9,6)
+                        ) AS cart_to_purchase_rate
+                    FROM interactions i
+                    FULL OUTER JOIN purchases p
+                        ON i.metric_date = p.metric_date AND i.product_id = p.product_id
+                    FULL OUTER JOIN reviews r
+                        ON COALESCE(i.metric_date, p.metric_date) = r.metric_date
+                       AND COALESCE(i.product_id, p.product_id) = r.product_id
+                    -- Each ratio is divided once; NULL when its denominator is 0 or missing.
+                    CROSS APPLY (
+                        SELECT
+                            CAST(ISNULL(i.add_to_cart_count, 0) AS decimal(18,6))
+                                / NULLIF(CAST(i.views_count AS decimal(18,6)), 0) AS view_to_cart,
+                            CAST(ISNULL(p.purchases_count, 0) AS decimal(18,6))
+                                / NULLIF(CAST(i.add_to_cart_count AS decimal(18,6)), 0) AS cart_to_purchase
+                    ) x
+                    WHERE COALESCE(i.product_id, p.product_id, r.product_id) IS NOT NULL
+                )""",
+                "merged",
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.reviews_quality WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
+            rows_inserted += _merge_since(
+                conn,
+                "gold.reviews_quality",
+                ("metric_date", "product_id"),
+                ("total_reviews", "five_star_reviews", "avg_rating"),
+                """
                 ;WITH reviews AS (
                     SELECT
                         CAST(created_at AS date) AS metric_date,
@@ -632,36 +688,29 @@ def main() -> int:
                     FROM silver.reviews
                     WHERE created_at >= :since_date
                     GROUP BY CAST(created_at AS date), product_id
-                )
-                INSERT INTO gold.reviews_quality (metric_date, product_id, total_reviews, five_star_reviews, avg_rating)
-                SELECT metric_date, product_id, total_reviews, five_star_reviews, avg_rating
-                FROM reviews
-                WHERE metric_date >= :since_date;
-                            """
-                    ),
-                    {"since_date": since_date},
-                )
+                )""",
+                "reviews",
+                {"since_date": since_date},
             )
 
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text("DELETE FROM gold.orders_payments_daily WHERE metric_date >= :since_date;"),
-                    {"since_date": since_date},
-                )
-            )
-            rows_inserted += _safe_rowcount(
-                conn.execute(
-                    text(
-                        """
+            rows_inserted += _merge_since(
+                conn,
+                "gold.orders_payments_daily",
+                ("metric_date",),
+                (
+                    "total_orders", "paid_orders", "cancelled_orders", "payment_success_rate", "total_revenue", "refunds_count",
+                ),
+                f"""
                 ;WITH raw AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS metric_date,
+                        event_date AS metric_date,
                         entity_id,
                         LOWER(LTRIM(RTRIM(event_type))) AS raw_event_type,
-                        payload
+                        extracted_total_amount AS total_amount
                     FROM bronze.business_events
                     WHERE event_timestamp >= :since_date
-                      AND (:show_seed_data = 1 OR payload NOT LIKE '%seed_run_id%')
+                      AND event_date >= :since_date
+                      AND {seed_filter}
                 ),
                 normalized AS (
                     SELECT
@@ -674,16 +723,7 @@ def main() -> int:
                             WHEN raw_event_type IN ('review_submitted', 'review.submitted') THEN 'REVIEW_SUBMITTED'
                             ELSE NULL
                         END AS normalized_type,
-                        TRY_CONVERT(
-                            decimal(12,2),
-                            COALESCE(
-                                JSON_VALUE(payload, '$.total_amount'),
-                                JSON_VALUE(payload, '$.data.total_amount'),
-                                JSON_VALUE(payload, '$.order.total_amount'),
-                                JSON_VALUE(payload, '$.amount'),
-                                JSON_VALUE(payload, '$.data.amount')
-                            )
-                        ) AS total_amount
+                        total_amount
                     FROM raw
                 ),
                 orders_by_day AS (
@@ -711,117 +751,77 @@ def main() -> int:
                         ISNULL(total_revenue, 0) AS total_revenue,
                         CAST(0 AS int) AS refunds_count
                     FROM orders_by_day
-                )
-                INSERT INTO gold.orders_payments_daily
-                    (metric_date, total_orders, paid_orders, cancelled_orders, payment_success_rate, total_revenue, refunds_count)
-                SELECT
-                    metric_date, total_orders, paid_orders, cancelled_orders, payment_success_rate, total_revenue, refunds_count
-                FROM merged
-                WHERE metric_date >= :since_date;
-                            """
-                    ),
-                    {"since_date": since_date, "show_seed_data": 1 if show_seed_data else 0},
-                )
+                )""",
+                "merged",
+                {"since_date": since_date},
             )
 
-            _exec_params(
+            _exec(
                 conn,
-                """
+                f"""
                 ;WITH pv AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS metric_date,
+                        event_date AS metric_date,
                         page_url,
                         COUNT(*) AS views,
                         COUNT(DISTINCT COALESCE(user_id, session_id)) AS unique_visitors,
                         AVG(TRY_CONVERT(decimal(10,2), JSON_VALUE(properties, '$.load_time_ms'))) AS avg_load_time_ms
                     FROM bronze.page_view_events
-                    WHERE (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
-                    GROUP BY CAST(event_timestamp AS date), page_url
+                    WHERE {seed_filter}
+                    GROUP BY event_date, page_url
                 ),
                 time_on_page AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS metric_date,
+                        event_date AS metric_date,
                         referrer_url AS page_url,
                         AVG(CAST(time_on_prev_page_seconds AS decimal(10,2))) AS avg_time_on_page_seconds
                     FROM bronze.page_view_events
                     WHERE referrer_url IS NOT NULL AND time_on_prev_page_seconds IS NOT NULL
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
-                    GROUP BY CAST(event_timestamp AS date), referrer_url
+                      AND {seed_filter}
+                    GROUP BY event_date, referrer_url
                 ),
                 scroll AS (
                     SELECT
-                        CAST(event_timestamp AS date) AS metric_date,
+                        event_date AS metric_date,
                         page_url,
                         AVG(scroll_depth_pct) AS avg_scroll_depth
                     FROM bronze.scroll_events
                     WHERE scroll_depth_pct IS NOT NULL
-                      AND (:show_seed_data = 1 OR COALESCE(properties, '') NOT LIKE '%seed_run_id%')
-                    GROUP BY CAST(event_timestamp AS date), page_url
+                      AND {seed_filter}
+                    GROUP BY event_date, page_url
                 ),
                 seed_sessions AS (
-                    SELECT DISTINCT
-                        CAST(event_timestamp AS date) AS metric_date,
-                        session_id
+                    -- Seed sessions are seeded end to end, so the session id alone
+                    -- identifies them; no per-row date cast on the probe side.
+                    SELECT DISTINCT session_id
                     FROM silver.web_events
-                    WHERE COALESCE(properties_json, '') LIKE '%seed_run_id%'
-                ),
-                seq_max AS (
-                    SELECT session_id, MAX(step_number) AS max_step
-                    FROM silver.page_sequence
-                    WHERE (:show_seed_data = 1 OR NOT EXISTS (
-                        SELECT 1
-                        FROM seed_sessions ss
-                        WHERE ss.metric_date = CAST(silver.page_sequence.event_timestamp AS date)
-                          AND ss.session_id = silver.page_sequence.session_id
-                    ))
-                    GROUP BY session_id
-                ),
-                entry AS (
-                    SELECT
-                        CAST(ps.event_timestamp AS date) AS metric_date,
-                        ps.page_url,
-                        COUNT(DISTINCT ps.session_id) AS entry_sessions,
-                        SUM(CASE WHEN mx.max_step = 1 THEN 1 ELSE 0 END) AS bounced_sessions
-                    FROM silver.page_sequence ps
-                    INNER JOIN seq_max mx ON ps.session_id = mx.session_id
-                    WHERE ps.step_number = 1
-                      AND (:show_seed_data = 1 OR NOT EXISTS (
-                          SELECT 1
-                          FROM seed_sessions ss
-                          WHERE ss.metric_date = CAST(ps.event_timestamp AS date)
-                            AND ss.session_id = ps.session_id
-                      ))
-                    GROUP BY CAST(ps.event_timestamp AS date), ps.page_url
+                    WHERE is_seed = 1
                 ),
-                exitp AS (
+                seq AS (
+                    -- One pass over page_sequence: each step carries its session's last
+                    -- step, so entry, bounce, exit and per-page session counts all come
+                    -- out of a single grouping below.
                     SELECT
                         CAST(ps.event_timestamp AS date) AS metric_date,
                         ps.page_url,
-                        COUNT(DISTINCT ps.session_id) AS exit_sessions
+                        ps.session_id,
+                        ps.step_number,
+                        MAX(ps.step_number) OVER (PARTITION BY ps.session_id) AS max_step
                     FROM silver.page_sequence ps
-                    INNER JOIN seq_max mx
-                        ON ps.session_id = mx.session_id AND ps.step_number = mx.max_step
-                    WHERE (:show_seed_data = 1 OR NOT EXISTS (
-                        SELECT 1
-                        FROM seed_sessions ss
-                        WHERE ss.metric_date = CAST(ps.event_timestamp AS date)
-                          AND ss.session_id = ps.session_id
-                    ))
-                    GROUP BY CAST(ps.event_timestamp AS date), ps.page_url
+                    WHERE {seq_seed_filter}
                 ),
-                sessions_viewed AS (
+                seq_pages AS (
+                    -- (session_id, step_number) is the page_sequence key, so each session
+                    -- contributes at most one step-1 row to the bounce sum.
                     SELECT
-                        CAST(event_timestamp AS date) AS metric_date,
+                        metric_date,
                         page_url,
+                        COUNT(DISTINCT CASE WHEN step_number = 1 THEN session_id END) AS entry_sessions,
+                        SUM(CASE WHEN step_number = 1 AND max_step = 1 THEN 1 ELSE 0 END) AS bounced_sessions,
+                        COUNT(DISTINCT CASE WHEN step_number = max_step THEN session_id END) AS exit_sessions,
                         COUNT(DISTINCT session_id) AS sessions_viewed
-                    FROM silver.page_sequence
-                    WHERE (:show_seed_data = 1 OR NOT EXISTS (
-                        SELECT 1
-                        FROM seed_sessions ss
-                        WHERE ss.metric_date = CAST(silver.page_sequence.event_timestamp AS date)
-                          AND ss.session_id = silver.page_sequence.session_id
-                    ))
-                    GROUP BY CAST(event_timestamp AS date), page_url
+                    FROM seq
+                    GROUP BY metric_date, page_url
                 ),
                 merged AS (
                     SELECT
@@ -832,14 +832,14 @@ def main() -> int:
                         tp.avg_time_on_page_seconds,
                         sc.avg_scroll_depth,
                         CASE
-                            WHEN e.entry_sessions IS NULL OR e.entry_sessions = 0 THEN NULL
-                            ELSE CAST(e.bounced_sessions AS decimal(10,4))
-                                / CAST(e.entry_sessions AS decimal(10,4))
+                            WHEN sp.entry_sessions IS NULL OR sp.entry_sessions = 0 THEN NULL
+                            ELSE CAST(sp.bounced_sessions AS decimal(10,4))
+                                / CAST(sp.entry_sessions AS decimal(10,4))
                         END AS bounce_rate,
                         CASE
-                            WHEN sv.sessions_viewed IS NULL OR sv.sessions_viewed = 0 THEN NULL
-                            ELSE CAST(ISNULL(x.exit_sessions, 0) AS decimal(10,4))
-                                / CAST(sv.sessions_viewed AS decimal(10,4))
+                            WHEN sp.sessions_viewed IS NULL OR sp.sessions_viewed = 0 THEN NULL
+                            ELSE CAST(sp.exit_sessions AS decimal(10,4))
+                                / CAST(sp.sessions_viewed AS decimal(10,4))
                         END AS exit_rate,
                         pv.avg_load_time_ms
                     FROM pv
@@ -847,12 +847,8 @@ def main() -> int:
                         ON pv.metric_date = tp.metric_date AND pv.page_url = tp.page_url
                     LEFT JOIN scroll sc
                         ON pv.metric_date = sc.metric_date AND pv.page_url = sc.page_url
-                    LEFT JOIN entry e
-                        ON pv.metric_date = e.metric_date AND pv.page_url = e.page_url
-                    LEFT JOIN exitp x
-                        ON pv.metric_date = x.metric_date AND pv.page_url = x.page_url
-                    LEFT JOIN sessions_viewed sv
-                        ON pv.metric_date = sv.metric_date AND pv.page_url = sv.page_url
+                    LEFT JOIN seq_pages sp
+                        ON pv.metric_date = sp.metric_date AND pv.page_url = sp.page_url
                 )
                 MERGE gold.page_performance AS tgt
                 USING merged AS src
@@ -876,12 +872,11 @@ def main() -> int:
                         src.avg_scroll_depth, src.bounce_rate, src.exit_rate, TRY_CONVERT(int, src.avg_load_time_ms)
                     );
                 """,
-                {"show_seed_data": 1 if show_seed_data else 0},
             )
 
             _exec(
                 conn,
-                """
+                f"""
                 ;WITH base AS (
                     SELECT
                         CAST([timestamp] AS date) AS metric_date,
@@ -889,31 +884,7 @@ def main() -> int:
                         response_time_ms,
                         status_code
                     FROM bronze.api_request_logs
-                ),
-                w AS (
-                    SELECT
-                        metric_date,
-                        service,
-                        CAST(
-                            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY response_time_ms)
-                            OVER (PARTITION BY metric_date, service) AS int
-                        ) AS p50_latency_ms,
-                        CAST(
-                            PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY response_time_ms)
-                            OVER (PARTITION BY metric_date, service) AS int
-                        ) AS p95_latency_ms,
-                        CAST(
-                            SUM(CASE WHEN status_code >= 500 THEN 1 ELSE 0 END)
-                            OVER (PARTITION BY metric_date, service) AS decimal(10,4)
-                        ) / NULLIF(
-                            CAST(COUNT(*) OVER (PARTITION BY metric_date, service) AS decimal(10,4)), 0
-                        ) AS error_rate
-                    FROM base
-                ),
-                agg AS (
-                    SELECT DISTINCT metric_date, service, p50_latency_ms, p95_latency_ms, error_rate
-                    FROM w
-                ),
+                ),{_latency_stats_sql(approx=approx_percentiles)}
                 dlq AS (
                     SELECT
                         CAST(failed_at AS date) AS metric_date,
@@ -959,40 +930,29 @@ def main() -> int:
                 """,
             )
 
-            _exec_params(
+            _exec(
                 conn,
-                """
+                f"""
                 ;WITH n AS (
                     SELECT
                         DATEADD(MINUTE, DATEDIFF(MINUTE, 0, SYSDATETIME()), 0) AS metric_timestamp,
                         DATEADD(MINUTE, -5, SYSDATETIME()) AS since_5m,
-                        CAST(SYSDATETIME() AS date) AS today
-                ),
-                seed_orders AS (
-                    SELECT DISTINCT
-                        COALESCE(
-                            be.entity_id,
-                            JSON_VALUE(be.payload, '$.order_id'),
-                            JSON_VALUE(be.payload, '$.data.order_id'),
-                            JSON_VALUE(be.payload, '$.order.order_id')
-                        ) AS order_id
-                    FROM bronze.business_events be
-                    WHERE be.event_timestamp >= DATEADD(day, -7, SYSDATETIME())
-                      AND be.payload LIKE '%seed_run_id%'
+                        CAST(SYSDATETIME() AS date) AS today,
+                        DATEADD(day, 1, CAST(CAST(SYSDATETIME() AS date) AS datetime2)) AS tomorrow
                 ),
                 active AS (
-                    SELECT COUNT(DISTINCT COALESCE(pv.user_id, pv.session_id)) AS active_users_now
+                    SELECT {_distinct_count_sql("COALESCE(pv.user_id, pv.session_id)", approx=approx)} AS active_users_now
                     FROM bronze.page_view_events pv
                     CROSS JOIN n
                     WHERE pv.event_timestamp >= n.since_5m
-                      AND (:show_seed_data = 1 OR COALESCE(pv.properties, '') NOT LIKE '%seed_run_id%')
+                      AND {pv_seed_filter}
                 ),
                 sessions_today AS (
-                    SELECT COUNT(DISTINCT pv.session_id) AS sessions_today
+                    SELECT {_distinct_count_sql("pv.session_id", approx=approx)} AS sessions_today
                     FROM bronze.page_view_events pv
                     CROSS JOIN n
-                    WHERE CAST(pv.event_timestamp AS date) = n.today
-                      AND (:show_seed_data = 1 OR COALESCE(pv.properties, '') NOT LIKE '%seed_run_id%')
+                    WHERE pv.event_timestamp >= n.today AND pv.event_timestamp < n.tomorrow
+                      AND {pv_seed_filter}
                 ),
                 orders_today AS (
                     SELECT
@@ -1000,8 +960,8 @@ def main() -> int:
                         SUM(ISNULL(total_amount, 0)) AS revenue_today
                     FROM silver.orders o
                     CROSS JOIN n
-                    WHERE o.status = 'paid' AND CAST(o.updated_at AS date) = n.today
-                      AND (:show_seed_data = 1 OR NOT EXISTS (SELECT 1 FROM seed_orders so WHERE so.order_id = o.order_id))
+                    WHERE o.status = 'paid' AND o.updated_at >= n.today AND o.updated_at < n.tomorrow
+                      AND NOT EXISTS (SELECT 1 FROM #seed_orders so WHERE so.order_id = o.order_id)
                 ),
                 top_product AS (
                     SELECT TOP 1
@@ -1009,8 +969,8 @@ def main() -> int:
                     FROM silver.order_items oi
                     INNER JOIN silver.orders o ON oi.order_id = o.order_id
                     CROSS JOIN n
-                    WHERE o.status = 'paid' AND CAST(o.updated_at AS date) = n.today
-                      AND (:show_seed_data = 1 OR NOT EXISTS (SELECT 1 FROM seed_orders so WHERE so.order_id = o.order_id))
+                    WHERE o.status = 'paid' AND o.updated_at >= n.today AND o.updated_at < n.tomorrow
+                      AND NOT EXISTS (SELECT 1 FROM #seed_orders so WHERE so.order_id = o.order_id)
                     GROUP BY oi.product_id
                     ORDER BY SUM(COALESCE(oi.line_total, oi.unit_price * oi.quantity, 0)) DESC
                 ),
@@ -1018,8 +978,8 @@ def main() -> int:
                     SELECT TOP 1 page_url AS top_page_url
                     FROM bronze.page_view_events pv
                     CROSS JOIN n
-                    WHERE CAST(pv.event_timestamp AS date) = n.today
-                      AND (:show_seed_data = 1 OR COALESCE(pv.properties, '') NOT LIKE '%seed_run_id%')
+                    WHERE pv.event_timestamp >= n.today AND pv.event_timestamp < n.tomorrow
+                      AND {pv_seed_filter}
                     GROUP BY page_url
                     ORDER BY COUNT(*) DESC
                 ),
@@ -1074,14 +1034,18 @@ def main() -> int:
                         src.top_product_id, src.top_page_url, src.avg_latency_ms, src.error_rate_percent
                     );
                 """,
-                {"show_seed_data": 1 if show_seed_data else 0},
             )
 
+            _exec(conn, "DROP TABLE #seed_orders; DROP TABLE #session_scope;")
             finish_run(conn, run, rows_inserted=rows_inserted)
         except Exception as exc:
             fail_run(conn, run, str(exc))
             raise
 
+    # Only mark the schema verified once the DDL above has actually committed.
+    with _SCHEMA_LOCK:
+        _SCHEMA_VERIFIED.add("gold")
+
     print("Gold layer built.")
     return 0
 
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+
+
+_BRONZE_SESSION_TABLES: tuple[str, ...] = (
+    "bronze.page_view_events",
+    "bronze.click_events",
+    "bronze.cart_events",
+    "bronze.checkout_events",
+    "bronze.scroll_events",
+    "bronze.search_events",
+)
+_BRONZE_EVENT_TABLES: tuple[str, ...] = (*_BRONZE_SESSION_TABLES, "bronze.business_events")
+
+
+def _drop_unguarded_json_column(conn, table: str, column: str, *, dependent_index: str) -> None:
+    # Earlier definitions called JSON_VALUE without an ISJSON guard, which raises on
+    # non-JSON payloads at write time; drop them (and the index carrying them) so
+    # the guarded definition is added in their place.
+    conn.execute(
+        text(f"""
+        IF EXISTS (
+            SELECT 1 FROM sys.computed_columns
+            WHERE object_id = OBJECT_ID('{table}')
+              AND name = '{column}'
+              AND LOWER(definition) NOT LIKE '%isjson%'
+        )
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = '{dependent_index}' AND object_id = OBJECT_ID('{table}')
+            )
+                DROP INDEX {dependent_index} ON {table};
+            ALTER TABLE {table} DROP COLUMN {column};
+        END
+        """)
+    )
+
+
+def ensure_bronze_derived_columns(conn) -> None:
+    for table in _BRONZE_EVENT_TABLES:
+        conn.execute(
+            text(f"""
+            IF OBJECT_ID('{table}', 'U') IS NOT NULL
+               AND COL_LENGTH('{table}', 'event_date') IS NULL
+                ALTER TABLE {table} ADD event_date AS CAST(event_timestamp AS date) PERSISTED;
+            """)
+        )
+    for table in _BRONZE_SESSION_TABLES:
+        conn.execute(
+            text(f"""
+            IF OBJECT_ID('{table}', 'U') IS NOT NULL
+               AND COL_LENGTH('{table}', 'clean_session_id') IS NULL
+                ALTER TABLE {table} ADD clean_session_id AS NULLIF(LTRIM(RTRIM(session_id)), '') PERSISTED;
+            """)
+        )
+    # Order id as gold's seed-order lookup resolves it, parsed once at write time.
+    _drop_unguarded_json_column(
+        conn,
+        "bronze.business_events",
+        "extracted_order_id",
+        dependent_index="IX_bronze_business_events_event_timestamp_derived",
+    )
+    conn.execute(
+        text("""
+        IF OBJECT_ID('bronze.business_events', 'U') IS NOT NULL
+           AND COL_LENGTH('bronze.business_events', 'extracted_order_id') IS NULL
+            ALTER TABLE bronze.business_events ADD extracted_order_id AS CONVERT(
+                nvarchar(64),
+                COALESCE(
+                    entity_id,
+                    CASE WHEN ISJSON(payload) = 1 THEN COALESCE(
+                        JSON_VALUE(payload, '$.order_id'),
+                        JSON_VALUE(payload, '$.data.order_id'),
+                        JSON_VALUE(payload, '$.order.order_id')
+                    ) END
+                )
+            ) PERSISTED;
+        """)
+    )
+    # Order amount as gold's orders_payments_daily resolves it; same write-time parse.
+    # Non-JSON payloads are stored as-is (silver dead-letters them), so the parse is
+    # guarded or the column would reject those inserts.
+    _drop_unguarded_json_column(
+        conn,
+        "bronze.business_events",
+        "extracted_total_amount",
+        dependent_index="IX_bronze_business_events_event_timestamp_derived",
+    )
+    conn.execute(
+        text("""
+        IF OBJECT_ID('bronze.business_events', 'U') IS NOT NULL
+           AND COL_LENGTH('bronze.business_events', 'extracted_total_amount') IS NULL
+            ALTER TABLE bronze.business_events ADD extracted_total_amount AS TRY_CONVERT(
+                decimal(12,2),
+                CASE WHEN ISJSON(payload) = 1 THEN COALESCE(
+                    JSON_VALUE(payload, '$.total_amount'),
+                    JSON_VALUE(payload, '$.data.total_amount'),
+                    JSON_VALUE(payload, '$.order.total_amount'),
+                    JSON_VALUE(payload, '$.amount'),
+                    JSON_VALUE(payload, '$.data.amount')
+                ) END
+            ) PERSISTED;
+        """)
+    )
+
+
+# Seed traffic is tagged with seed_run_id inside its JSON; gold filters on this flag
+# instead of re-running the substring match on every read.
+_SEED_FLAG_SOURCES: dict[str, str] = {
+    "bronze.page_view_events": "properties",
+    "bronze.click_events": "properties",
+    "bronze.scroll_events": "properties",
+    "bronze.business_events": "payload",
+    "silver.web_events": "properties_json",
+    "silver.product_interactions": "properties",
+    "silver.session_events": "properties_json",
+}
+
+
+def ensure_seed_flag_columns(conn) -> None:
+    for table, col in _SEED_FLAG_SOURCES.items():
+        conn.execute(
+            text(f"""
+            IF OBJECT_ID('{table}', 'U') IS NOT NULL
+               AND COL_LENGTH('{table}', 'is_seed') IS NULL
+                ALTER TABLE {table}
+                    ADD is_seed AS CAST(CASE WHEN {col} LIKE '%seed_run_id%' THEN 1 ELSE 0 END AS bit) PERSISTED;
+            """)
+        )
+
+
+def ensure_business_events_window_index(conn) -> None:
+    # The one index for windowed business_events reads: silver's business builds and
+    # gold's orders rollup both filter on event_timestamp and, apart from silver's
+    # payload parse, only touch these columns. payload itself stays out so the index
+    # never duplicates LOB data; event_id comes along as the clustering key. It
+    # replaces the plain event_timestamp index and the old data-dependent covering
+    # index, and is rebuilt once on installs that still have the narrower shape.
+    conn.execute(
+        text("""
+        IF OBJECT_ID('bronze.business_events', 'U') IS NOT NULL
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_bronze_business_events_event_timestamp_derived'
+                  AND object_id = OBJECT_ID('bronze.business_events')
+            )
+               AND COL_LENGTH('bronze.business_events', 'event_date') IS NOT NULL
+               AND NOT EXISTS (
+                   SELECT 1
+                   FROM sys.indexes i
+                   INNER JOIN sys.index_columns ic
+                       ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+                   INNER JOIN sys.columns c
+                       ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+                   WHERE i.name = 'IX_bronze_business_events_event_timestamp_derived'
+                     AND i.object_id = OBJECT_ID('bronze.business_events')
+                     AND c.name = 'event_date'
+               )
+                DROP INDEX IX_bronze_business_events_event_timestamp_derived ON bronze.business_events;
+
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_bronze_business_events_event_timestamp_derived'
+                  AND object_id = OBJECT_ID('bronze.business_events')
+            )
+                CREATE INDEX IX_bronze_business_events_event_timestamp_derived
+                    ON bronze.business_events (event_timestamp)
+                    INCLUDE (
+                        event_type, event_date, correlation_id, service, user_id, entity_id,
+                        is_seed, extracted_order_id, extracted_total_amount
+                    );
+
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_bronze_business_events_event_timestamp_covering'
+                  AND object_id = OBJECT_ID('bronze.business_events')
+            )
+                DROP INDEX IX_bronze_business_events_event_timestamp_covering ON bronze.business_events;
+
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_bronze_business_events_event_timestamp'
+                  AND object_id = OBJECT_ID('bronze.business_events')
+            )
+                DROP INDEX IX_bronze_business_events_event_timestamp ON bronze.business_events;
+        END
+        """)
+    )
+
+
+def ensure_derived_schema(conn) -> None:
+    # Everything gold reads off bronze beyond the ingest columns. Owned here rather
+    # than by a single ETL step so the warehouse setup, silver and gold can each
+    # bring it up to date (gold may run without silver, ETL_ENABLE_SILVER=no).
+    ensure_bronze_derived_columns(conn)
+    ensure_seed_flag_columns(conn)
+    ensure_business_events_window_index(conn)